@@ -0,0 +1,103 @@
+"""Batch converter: directory of images -> packed LED frame file.
+
+Runs the processImage.py resize/Sobel/Canny/threshold pipeline over every
+image in a directory on a process pool and writes the results with
+frameFile.FrameFileWriter (8 bytes per frame plus a JSON index). Play the
+result with:  python ledMatrix.py frames.led
+
+Example:
+    python batchFrames.py images/ -o frames.led --methods sobelpic cannypic
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+
+import frameFile
+import processImage
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"}
+METHODS = ("binarypic", "sobelpic", "cannypic")
+
+
+def findImages(directory, recursive=False):
+    """Return the image files in a directory, sorted by name."""
+    pattern = "**/*" if recursive else "*"
+    return sorted(p for p in Path(directory).glob(pattern)
+                  if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+def processFile(path, invert=True, threshold=127, reverse_bits=False):
+    """Worker: run the in-memory pipeline on one image file.
+
+    Returns (path, frames, error) where frames maps method name to 8 row
+    bytes, or is None if the image could not be processed.
+    """
+    try:
+        image = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise FileNotFoundError(f"Image not found at path: {path}")
+        frames = processImage.imageToFrames(image, invert=invert, threshold=threshold,
+                                            reverse_bits=reverse_bits)
+        return str(path), frames, None
+    except Exception as e:
+        return str(path), None, str(e)
+
+
+def convertDirectory(directory, output, methods=METHODS, workers=None, recursive=False,
+                     invert=True, threshold=127, reverse_bits=False, chunksize=8):
+    """Convert every image in directory into frames of output.
+
+    Results come back in file order, so frame order in the file is stable
+    between runs. Returns (frames_written, failures) where failures is a
+    list of (path, error message).
+    """
+    paths = findImages(directory, recursive)
+    failures = []
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            frameFile.FrameFileWriter(output) as writer:
+        results = pool.map(processFile, paths,
+                           [invert] * len(paths), [threshold] * len(paths),
+                           [reverse_bits] * len(paths), chunksize=chunksize)
+        for path, frames, error in results:
+            if frames is None:
+                failures.append((path, error))
+                continue
+            for method in methods:
+                writer.add(frames[method], name=f"{Path(path).stem}:{method}",
+                           source=os.path.relpath(path, directory), method=method)
+        written = len(writer)
+    return written, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a directory of images into a packed LED frame file.")
+    parser.add_argument("directory", help="directory containing the source images")
+    parser.add_argument("-o", "--output", default="frames.led", help="frame file to write (default: frames.led)")
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=list(METHODS),
+                        help="pipeline outputs to store for each image")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--recursive", action="store_true", help="also search sub-directories")
+    parser.add_argument("--threshold", type=int, default=127, help="binarization threshold")
+    parser.add_argument("--no-invert", action="store_true", help="bright pixels = LED on for binarypic")
+    parser.add_argument("--reverse-bits", action="store_true", help="reverse the bit order in each row")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    written, failures = convertDirectory(args.directory, args.output, methods=args.methods,
+                                         workers=args.workers, recursive=args.recursive,
+                                         invert=not args.no_invert, threshold=args.threshold,
+                                         reverse_bits=args.reverse_bits)
+    elapsed = time.perf_counter() - start
+
+    for path, error in failures:
+        print(f"  ✗ {path}: {error}")
+    print(f"✓ Wrote {written} frames to {args.output} in {elapsed:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""Refresh-rate benchmark for the LED matrix drivers, using fakeGPIO.
+
+Times the original per-bit shiftOut() scan against the precompiled scan
+plans in ledMatrix.py. Row dwell is measured from the latch rising edges
+recorded by fakeGPIO, so it includes all the Python overhead between rows.
+
+The grayscale section reports, per BAM bit depth, the highest refresh rate
+the schedule allows when the shortest slot is a single row write, and how
+matrixDriver.MatrixDriver holds a range of target refresh rates.
+
+The backend section compares the bit-banged output with the spidev
+backend (using fakeSpidev): refresh rate with no row dwell, and the CPU
+time the refresh thread uses at a fixed refresh rate.
+
+Runs on any machine; LED_MATRIX_FAKE is set so ledMatrix uses the fakes:
+    python benchmarkMatrix.py
+"""
+
+import os
+import statistics
+import time
+
+import numpy as np
+
+os.environ.setdefault('LED_MATRIX_FAKE', '1')
+
+import fakeGPIO
+import fakeSpidev
+import ledMatrix
+import matrixDriver
+from ledMatrix import MSBFIRST, clockPin, dataPin, latchPin
+
+PATTERN = ledMatrix.sobelpic
+BITBANG = ledMatrix.BitBangBackend()
+
+
+def legacyScan(pattern, frames, rowDwell):
+    """The original displayPattern() row loop, run for a number of frames."""
+    GPIO = ledMatrix.GPIO
+    for _ in range(frames):
+        x = 0x80
+        for i in range(0, 8):
+            GPIO.output(latchPin, GPIO.LOW)
+            ledMatrix.shiftOut(dataPin, clockPin, MSBFIRST, pattern[i])
+            ledMatrix.shiftOut(dataPin, clockPin, MSBFIRST, ~x)
+            GPIO.output(latchPin, GPIO.HIGH)
+            if rowDwell:
+                time.sleep(rowDwell)
+            x >>= 1
+
+
+def precompiledScan(pattern, frames, rowDwell, backend=BITBANG):
+    """Scan plan replay, as ledMatrix.playScanPlan() does it."""
+    plan = ledMatrix.compileScanPlan(pattern, backend)
+    writeRow = backend.writeRow
+    sleep = time.sleep
+    for _ in range(frames):
+        for row in plan:
+            writeRow(row)
+            if rowDwell:
+                sleep(rowDwell)
+
+
+def measure(scan, frames, rowDwell):
+    """Run a scan function against fakeGPIO and summarise the timing."""
+    fakeGPIO.reset()
+    fakeGPIO.watchPin(latchPin)
+    start = time.perf_counter()
+    scan(PATTERN, frames, rowDwell)
+    elapsed = time.perf_counter() - start
+    dwell = [b - a for a, b in zip(fakeGPIO.risingEdges, fakeGPIO.risingEdges[1:])]
+    return {
+        'refresh_hz': frames / elapsed,
+        'row_us': statistics.mean(dwell) * 1e6,
+        'row_jitter_us': statistics.pstdev(dwell) * 1e6,
+        'calls_per_row': fakeGPIO.calls / (frames * 8),
+        'writes_per_row': fakeGPIO.operations / (frames * 8),
+    }
+
+
+def checkSequences():
+    """Both scans must produce exactly the same pin sequence."""
+    recorded = []
+    for scan in (legacyScan, precompiledScan):
+        fakeGPIO.reset()
+        fakeGPIO.startRecording()
+        scan(PATTERN, 1, 0)
+        recorded.append(fakeGPIO.sequence)
+    if recorded[0] != recorded[1]:
+        raise AssertionError("Precompiled scan plan differs from shiftOut() output")
+
+
+def printRow(name, result):
+    print(f"{name:<22}{result['refresh_hz']:>10.0f} Hz{result['row_us']:>10.1f} us"
+          f"{result['row_jitter_us']:>10.1f} us{result['calls_per_row']:>8.0f}"
+          f"{result['writes_per_row']:>8.0f}")
+
+
+def measureBam(bits, frames=200, rates=(100, 200, 400, 800), seconds=0.5):
+    """Refresh limits of the bit-angle modulation schedule at one bit depth."""
+    levels = np.random.default_rng(bits).integers(0, 1 << bits, size=(8, 8))
+    plan = ledMatrix.compileGrayPlan(levels, bits, BITBANG)
+    writeRow = BITBANG.writeRow
+
+    # Back-to-back replay: what a single schedule entry costs to write
+    fakeGPIO.reset()
+    start = time.perf_counter()
+    for _ in range(frames):
+        for row, ticks in plan:
+            writeRow(row)
+    entryTime = (time.perf_counter() - start) / (frames * len(plan))
+    ticksPerFrame = sum(ticks for _, ticks in plan)
+
+    print(f"{bits} bit ({1 << bits} levels): {len(plan)} entries, {ticksPerFrame} ticks/frame, "
+          f"max refresh {1 / (ticksPerFrame * entryTime):.0f} Hz "
+          f"(LSB slot = one {entryTime * 1e6:.1f} us row write)")
+    for rate in rates:
+        with matrixDriver.MatrixDriver(BITBANG, refreshRate=rate) as driver:
+            driver.showGray(levels, bits)
+            time.sleep(seconds)
+            stats = driver.stats()
+        print(f"    driver at {rate:4d} Hz: {stats['frames'] / seconds:6.0f} frames/s, "
+              f"{stats['missedRefreshes']:4d} missed, jitter {stats['rowJitterUs']:.1f} us")
+
+
+def checkSpiTransfers():
+    """The SPI backend must send the same two bytes per row as shiftOut()."""
+    spi = fakeSpidev.SpiDev(0, 0)
+    precompiledScan(PATTERN, 1, 0, ledMatrix.SpiBackend(spi))
+    expected = [[PATTERN[i], ~(0x80 >> i) & 0xFF] for i in range(8)]
+    if spi.transfers != expected:
+        raise AssertionError("SPI backend transfers differ from the bit-banged bytes")
+
+
+def measureBackend(backend, frames=2000, rate=200, seconds=1.0):
+    """Refresh rate and refresh-thread CPU use of one output backend."""
+    fakeGPIO.reset()
+    start = time.perf_counter()
+    precompiledScan(PATTERN, frames, 0, backend)
+    refresh = frames / (time.perf_counter() - start)
+
+    cpuStart = time.process_time()
+    with matrixDriver.MatrixDriver(backend, refreshRate=rate) as driver:
+        driver.show(PATTERN)
+        time.sleep(seconds)
+        stats = driver.stats()
+    cpu = (time.process_time() - cpuStart) / seconds
+    print(f"{backend.name:<10}{refresh:>10.0f} Hz{cpu * 100:>10.1f} %"
+          f"{stats['missedRefreshes']:>8d}{stats['rowJitterUs']:>10.1f} us")
+
+
+def main():
+    if ledMatrix.GPIO is not fakeGPIO:
+        raise SystemExit("ledMatrix is using RPi.GPIO; run this benchmark with LED_MATRIX_FAKE=1")
+    checkSequences()
+    checkSpiTransfers()
+    print(f"{'':<22}{'refresh':>13}{'row dwell':>13}{'jitter':>13}{'calls':>8}{'writes':>8}")
+    for rowDwell, frames in ((0, 2000), (0.001, 100)):
+        print(f"-- row dwell setting {rowDwell * 1000:g} ms --")
+        printRow("shiftOut (original)", measure(legacyScan, frames, rowDwell))
+        printRow("precompiled plan", measure(precompiledScan, frames, rowDwell))
+
+    print("\n-- grayscale (bit-angle modulation) --")
+    for bits in (1, 2, 3, 4):
+        measureBam(bits)
+
+    print("\n-- output backends (driver at 200 Hz) --")
+    print(f"{'':<10}{'refresh':>13}{'CPU':>12}{'missed':>8}{'jitter':>13}")
+    measureBackend(BITBANG)
+    spi = fakeSpidev.SpiDev(0, 0)
+    spi.record = False
+    measureBackend(ledMatrix.SpiBackend(spi))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""In-process stand-in for RPi.GPIO.
+
+Implements the parts of the RPi.GPIO API the lab scripts use, so
+ledMatrix.py can run (and be timed) on a machine without a Pi. Instead of
+driving pins it keeps the current level of each pin, counts pin writes and
+can record the pin sequence or the rising-edge times of one pin.
+
+    import fakeGPIO as GPIO
+    GPIO.watchPin(13)               # record latch rising edges
+    ...
+    GPIO.risingEdges                # perf_counter() time of each edge
+"""
+
+import time
+
+BOARD = 10
+BCM = 11
+OUT = 0
+IN = 1
+LOW = 0
+HIGH = 1
+PUD_OFF = 20
+PUD_DOWN = 21
+PUD_UP = 22
+
+levels = {}          # pin -> last level written
+operations = 0       # number of individual pin writes
+calls = 0            # number of output() calls
+sequence = None      # list of (pin, level) when recording
+risingEdges = []     # perf_counter() times of rising edges on the watched pin
+_watchedPin = None
+_mode = None
+
+
+def setmode(mode):
+    global _mode
+    _mode = mode
+
+
+def getmode():
+    return _mode
+
+
+def setwarnings(flag):
+    pass
+
+
+def setup(channel, direction, pull_up_down=PUD_OFF, initial=None):
+    channels = channel if isinstance(channel, (list, tuple)) else [channel]
+    for ch in channels:
+        levels[ch] = LOW if initial is None else initial
+
+
+def input(channel):
+    return levels.get(channel, LOW)
+
+
+def output(channel, value):
+    """Set one pin, or several pins in order (same semantics as RPi.GPIO)."""
+    global operations, calls
+    calls += 1
+    if isinstance(channel, (list, tuple)):
+        if not isinstance(value, (list, tuple)):
+            value = [value] * len(channel)
+        if _watchedPin is not None and _watchedPin in channel:
+            _checkEdge([v for ch, v in zip(channel, value) if ch == _watchedPin])
+        if sequence is not None:
+            sequence.extend(zip(channel, value))
+        levels.update(zip(channel, value))
+        operations += len(channel)
+    else:
+        if channel == _watchedPin and _watchedPin is not None:
+            _checkEdge([value])
+        if sequence is not None:
+            sequence.append((channel, value))
+        levels[channel] = value
+        operations += 1
+
+
+def _checkEdge(watchedValues):
+    # A rising edge happened if the pin ends HIGH after being LOW at any
+    # point during this call (or before it).
+    if watchedValues[-1] and (not levels.get(_watchedPin, LOW) or not all(watchedValues)):
+        risingEdges.append(time.perf_counter())
+
+
+def watchPin(pin):
+    """Record the time of every rising edge on pin (None to stop)."""
+    global _watchedPin
+    _watchedPin = pin
+    risingEdges.clear()
+
+
+def startRecording():
+    """Record every (pin, level) write into sequence."""
+    global sequence
+    sequence = []
+
+
+def reset():
+    """Forget pin levels, counters and recordings."""
+    global operations, calls, sequence, _watchedPin
+    levels.clear()
+    risingEdges.clear()
+    operations = 0
+    calls = 0
+    sequence = None
+    _watchedPin = None
+
+
+def cleanup(channel=None):
+    levels.clear()
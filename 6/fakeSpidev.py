@@ -0,0 +1,47 @@
+"""In-process stand-in for the spidev module.
+
+SpiDev records every transfer instead of talking to /dev/spidev*, so the
+SPI output backend of ledMatrix.py can be checked and timed without a Pi.
+
+    import fakeSpidev as spidev
+    spi = spidev.SpiDev()
+    spi.open(0, 0)
+    spi.writebytes([0x3C, 0x7F])
+    spi.transfers                  # [[0x3C, 0x7F]]
+"""
+
+
+class SpiDev:
+    def __init__(self, bus=None, device=None):
+        self.bus = None
+        self.device = None
+        self.max_speed_hz = 500000
+        self.mode = 0
+        self.bits_per_word = 8
+        self.lsbfirst = False
+        self.transfers = []      # one list of bytes per transfer
+        self.bytesSent = 0
+        self.record = True       # set False to only count bytes
+        if bus is not None:
+            self.open(bus, device)
+
+    def open(self, bus, device):
+        self.bus = bus
+        self.device = device
+
+    def close(self):
+        self.bus = None
+        self.device = None
+
+    def writebytes(self, values):
+        if self.bus is None:
+            raise OSError("SPI device is not open")
+        self.bytesSent += len(values)
+        if self.record:
+            self.transfers.append(list(values))
+
+    def xfer2(self, values, speed_hz=0, delay_usecs=0, bits_per_word=0):
+        self.writebytes(values)
+        return [0] * len(values)
+
+    xfer = xfer2
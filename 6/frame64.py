@@ -0,0 +1,126 @@
+"""8x8 LED frames stored as single 64-bit integers.
+
+A frame's 8 row bytes are packed big-endian: row 0 is the most significant
+byte and, within a row, the MSB is column 0 (the same bit order
+convertToHex() produces). Pixel (row, col) is therefore bit 63 - 8*row - col.
+
+All eight rotations/mirrors of the square (the dihedral group) are built
+from three primitives:
+    flipVertical      reverse the row order     (byte swap)
+    mirrorHorizontal  reverse each row's bits   (256-entry lookup table)
+    transpose         swap rows and columns     (3-step bit-twiddling transpose)
+
+Every function takes either a Python int (one frame) or a NumPy array of
+frames (any shape, converted to uint64) and returns the same kind, so whole
+clips are oriented in a few vectorized operations.
+"""
+
+import numpy as np
+
+# REVERSE_TABLE[b] is byte b with its bit order reversed
+REVERSE_TABLE = np.array([int(f"{b:08b}"[::-1], 2) for b in range(256)], dtype=np.uint8)
+
+_U64 = np.uint64
+
+
+def _asFrames(frames):
+    return np.asarray(frames, dtype=_U64)
+
+
+def _like(result, frames):
+    # Hand back a Python int if a single Python int came in
+    return int(result) if isinstance(frames, int) else result
+
+
+def packFrames(rows):
+    """Pack row bytes of shape (..., 8) into uint64 frames of shape (...)."""
+    rows = np.ascontiguousarray(rows, dtype=np.uint8)
+    if rows.shape[-1] != 8:
+        raise ValueError(f"Frames need 8 row bytes, got shape {rows.shape}")
+    return rows.view(">u8").astype(_U64).reshape(rows.shape[:-1])
+
+
+def unpackFrames(frames):
+    """Unpack uint64 frames of shape (...) into row bytes of shape (..., 8)."""
+    frames = _asFrames(frames)
+    flat = frames.reshape(-1).astype(">u8")
+    return flat.view(np.uint8).reshape(frames.shape + (8,))
+
+
+def toFrame(pattern):
+    """Pack one pattern (list of 8 row bytes) into a Python int."""
+    return int(packFrames(pattern))
+
+
+def toPattern(frame):
+    """Unpack one frame into a list of 8 row bytes."""
+    return unpackFrames(frame).tolist()
+
+
+def flipVertical(frames):
+    """Reverse the row order (top <-> bottom)."""
+    return _like(_asFrames(frames).byteswap(), frames)
+
+
+def mirrorHorizontal(frames):
+    """Reverse the bits of every row (left <-> right)."""
+    data = _asFrames(frames)
+    flat = np.ascontiguousarray(data.reshape(-1))
+    return _like(REVERSE_TABLE[flat.view(np.uint8)].view(_U64).reshape(data.shape), frames)
+
+
+def transpose(frames):
+    """Swap rows and columns: new[r][c] = old[c][r]."""
+    x = _asFrames(frames)
+    t = (x ^ (x >> _U64(7))) & _U64(0x00AA00AA00AA00AA)
+    x = x ^ t ^ (t << _U64(7))
+    t = (x ^ (x >> _U64(14))) & _U64(0x0000CCCC0000CCCC)
+    x = x ^ t ^ (t << _U64(14))
+    t = (x ^ (x >> _U64(28))) & _U64(0x00000000F0F0F0F0)
+    x = x ^ t ^ (t << _U64(28))
+    return _like(x, frames)
+
+
+def rotateLeft90(frames):
+    """Rotate 90 degrees counter-clockwise: new[r][c] = old[c][7-r]."""
+    return flipVertical(transpose(frames))
+
+
+def rotateRight90(frames):
+    """Rotate 90 degrees clockwise: new[r][c] = old[7-c][r]."""
+    return mirrorHorizontal(transpose(frames))
+
+
+def rotate180(frames):
+    """Rotate 180 degrees: new[r][c] = old[7-r][7-c]."""
+    return flipVertical(mirrorHorizontal(frames))
+
+
+def antiTranspose(frames):
+    """Mirror across the anti-diagonal: new[r][c] = old[7-c][7-r]."""
+    return rotate180(transpose(frames))
+
+
+def identity(frames):
+    return frames
+
+
+# The dihedral group of the square, by name
+TRANSFORMS = {
+    'identity': identity,
+    'rotateLeft90': rotateLeft90,
+    'rotate180': rotate180,
+    'rotateRight90': rotateRight90,
+    'mirrorHorizontal': mirrorHorizontal,
+    'flipVertical': flipVertical,
+    'transpose': transpose,
+    'antiTranspose': antiTranspose,
+}
+
+
+def transform(frames, name):
+    """Apply one of the eight TRANSFORMS to frames."""
+    try:
+        return TRANSFORMS[name](frames)
+    except KeyError:
+        raise ValueError(f"Unknown transform '{name}', expected one of {list(TRANSFORMS)}") from None
@@ -0,0 +1,114 @@
+"""Packed LED frame file format.
+
+Replaces the Python-literal imageHexData.dat / imageData.log output with a
+binary file that ledMatrix.py can memory-map and play directly:
+
+    offset 0   header (32 bytes): magic b"LEDF", version (u16),
+               frame size in bytes (u16), frame count (u32),
+               index offset (u64), zero padding
+    offset 32  frame data: frame count * 8 bytes, one byte per matrix row
+    index      UTF-8 JSON list with one entry per frame
+               ({"name": ..., "source": ..., "method": ...})
+
+All integers are little-endian.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b"LEDF"
+VERSION = 1
+FRAME_SIZE = 8
+HEADER = struct.Struct("<4sHHIQ")
+HEADER_SIZE = 32
+
+
+class FrameFileWriter:
+    """Stream frames into a packed frame file.
+
+    Frames are written as they are added, so memory use does not grow with
+    the number of frames; only the (small) index is kept until close().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(b"\0" * HEADER_SIZE)
+        self._index = []
+
+    def add(self, rows, name="", **info):
+        """Append one frame (8 row bytes) with its index entry."""
+        frame = np.asarray(rows, dtype=np.uint8).reshape(-1)
+        if frame.size != FRAME_SIZE:
+            raise ValueError(f"A frame needs {FRAME_SIZE} row bytes, got {frame.size}")
+        self._file.write(frame.tobytes())
+        self._index.append(dict(name=name, **info))
+
+    def close(self):
+        """Write the index and header; the file is only valid after this."""
+        if self._file.closed:
+            return
+        index_offset = HEADER_SIZE + FRAME_SIZE * len(self._index)
+        self._file.write(json.dumps(self._index).encode("utf-8"))
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, FRAME_SIZE, len(self._index), index_offset))
+        self._file.close()
+
+    def abort(self):
+        """Close without writing the header.
+
+        The header stays zeroed, so FrameFile rejects the partial file instead
+        of reading a truncated one as valid.
+        """
+        self._file.close()
+
+    def __len__(self):
+        return len(self._index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+class FrameFile:
+    """Read-only, memory-mapped view of a packed frame file.
+
+    frames is an (N, 8) uint8 np.memmap, so opening a file does not read the
+    frame data; rows are paged in as they are played.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, frame_size, count, index_offset = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an LED frame file")
+            if version != VERSION or frame_size != FRAME_SIZE:
+                raise ValueError(f"Unsupported frame file version {version} (frame size {frame_size})")
+            f.seek(index_offset)
+            self.index = json.loads(f.read().decode("utf-8"))
+        self.path = path
+        if count:
+            self.frames = np.memmap(path, dtype=np.uint8, mode="r",
+                                    offset=HEADER_SIZE, shape=(count, FRAME_SIZE))
+        else:
+            self.frames = np.zeros((0, FRAME_SIZE), dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, i):
+        return self.frames[i]
+
+    def find(self, name):
+        """Return the position of the frame called name."""
+        for i, entry in enumerate(self.index):
+            if entry.get("name") == name:
+                return i
+        raise KeyError(name)
@@ -0,0 +1,82 @@
+"""Vectorized binary-frame to LED byte packing.
+
+convertToHex() in processImage.py builds every row byte from a string of
+'0'/'1' characters and prints as it goes, one 8x8 frame at a time.
+convertToHexBatch() does the same conversion for a whole stack of frames
+with np.packbits and never prints.
+
+Run this file directly to benchmark both converters on 100k frames.
+"""
+
+import contextlib
+import io
+import time
+
+import numpy as np
+
+
+def convertToHexBatch(binary_frames, reverse_bits=False):
+    """Pack a stack of binary frames into LED row bytes.
+
+    Args:
+        binary_frames: Array of shape (N, rows, cols) or a single (rows, cols)
+            frame. Any non-zero pixel counts as LED on.
+        reverse_bits: If True, the first pixel of a row becomes the LSB
+            instead of the MSB (same as convertToHex(reverse_bits=True))
+
+    Returns:
+        uint8 array of shape (N, rows), or (rows,) for a single frame.
+        Rows wider than 8 pixels are truncated, narrower rows are zero padded,
+        matching convertToHex().
+    """
+    frames = np.asarray(binary_frames)
+    single = frames.ndim == 2
+    if single:
+        frames = frames[np.newaxis]
+    if frames.ndim != 3:
+        raise ValueError(f"Expected (N, rows, cols) frames, got shape {frames.shape}")
+
+    bits = frames[..., :8] != 0
+    if reverse_bits:
+        bits = bits[..., ::-1]
+        # Rows narrower than 8 pixels still pad on the low-order side
+        # after the flip, exactly like np.pad followed by [::-1].
+        if bits.shape[-1] < 8:
+            pad = np.zeros(bits.shape[:-1] + (8 - bits.shape[-1],), dtype=bool)
+            bits = np.concatenate([pad, bits], axis=-1)
+    packed = np.packbits(bits, axis=-1).reshape(frames.shape[0], frames.shape[1])
+    return packed[0] if single else packed
+
+
+def benchmark(num_frames=100_000, seed=0):
+    """Time convertToHexBatch() against processImage.convertToHex().
+
+    The per-row prints of convertToHex() are sent to an in-memory buffer so
+    the terminal does not dominate the measurement.
+    """
+    import processImage
+
+    rng = np.random.default_rng(seed)
+    frames = rng.integers(0, 2, size=(num_frames, 8, 8), dtype=np.uint8)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        reference = [processImage.convertToHex(frame) for frame in frames]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    packed = convertToHexBatch(frames)
+    batch_time = time.perf_counter() - start
+
+    if not np.array_equal(packed, np.array(reference, dtype=np.uint8)):
+        raise AssertionError("convertToHexBatch output differs from convertToHex")
+
+    print(f"Frames:            {num_frames}")
+    print(f"convertToHex:      {loop_time:.3f} s")
+    print(f"convertToHexBatch: {batch_time:.4f} s")
+    print(f"Speedup:           {loop_time / batch_time:.0f}x")
+    return loop_time, batch_time
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -1,6 +1,27 @@
-import RPi.GPIO as GPIO
+import os
+import sys
 import time
 
+# Set LED_MATRIX_FAKE=1 to run without a Pi: the recording fakes (fakeGPIO,
+# fakeSpidev) then stand in for RPi.GPIO and spidev, so the refresh loop can
+# be run and timed anywhere (see benchmarkMatrix.py). The fakes are never
+# used otherwise, so a missing RPi.GPIO on the Pi fails loudly.
+USE_FAKE = os.environ.get('LED_MATRIX_FAKE') == '1'
+if USE_FAKE:
+    import fakeGPIO as GPIO
+else:
+    try:
+        import RPi.GPIO as GPIO
+    except ImportError as e:
+        raise ImportError("RPi.GPIO is not available; set LED_MATRIX_FAKE=1 "
+                          "to run with fakeGPIO instead") from e
+
+import numpy as np
+
+import frame64
+import frameFile
+import videoFrames
+
 LSBFIRST = 1
 MSBFIRST = 2
 
@@ -9,39 +30,39 @@ dataPin   = 11      # DS Pin of 74HC595(Pin14) - Serial data input
 latchPin  = 13      # ST_CP Pin of 74HC595(Pin12) - Storage register clock
 clockPin = 15       # SH_CP Pin of 74HC595(Pin11) - Shift register clock
 
+# Output backend: 'bitbang' drives dataPin/clockPin through GPIO, 'spi' sends
+# each row's two bytes with spidev (wire DS to MOSI, pin 19, and SH_CP to
+# SCLK, pin 23; the latch stays on latchPin)
+OUTPUT_BACKEND = 'bitbang'
+SPI_BUS = 0
+SPI_DEVICE = 0
+SPI_SPEED_HZ = 8000000
+
+# Backend returned by the last setup() in this module, used by the calls
+# that leave their backend argument out (the original lab code)
+activeBackend = None
+
 def reverseBits(byte):
     """Reverse the bits in a byte (mirror horizontally).
     This corrects horizontal flipping in the LED display."""
-    result = 0
-    for i in range(8):
-        if byte & (1 << i):
-            result |= (1 << (7 - i))
-    return result
+    return int(frame64.REVERSE_TABLE[byte & 0xFF])
 
 def mirrorHorizontal(pattern):
     """Mirror a pattern horizontally by reversing bits in each row."""
-    return [reverseBits(byte) for byte in pattern]
+    return frame64.toPattern(frame64.mirrorHorizontal(frame64.toFrame(pattern)))
 
 def rotateLeft90(pattern):
     """Rotate pattern 90 degrees counter-clockwise (left).
     This corrects the orientation mismatch between OpenCV and LED display."""
-    # Convert bytes to 8x8 bit array
-    bits = []
-    for byte in pattern:
-        row = [(byte >> (7-i)) & 1 for i in range(8)]
-        bits.append(row)
-    
-    # Rotate: new[row][col] = old[col][7-row]
-    rotated = [[bits[col][7-row] for col in range(8)] for row in range(8)]
-    
-    # Convert back to bytes
-    result = []
-    for row in rotated:
-        byte = 0
-        for i, bit in enumerate(row):
-            byte |= (bit << (7-i))
-        result.append(byte)
-    return result
+    return frame64.toPattern(frame64.rotateLeft90(frame64.toFrame(pattern)))
+
+def orientFrames(raw_frames):
+    """Apply the display orientation fix to raw frames of shape (..., 8).
+
+    Mirroring horizontally and then rotating left 90 degrees is the same as
+    a transpose, so every frame is fixed with one vectorized bit transpose.
+    """
+    return frame64.unpackFrames(frame64.transpose(frame64.packFrames(raw_frames)))
 
 # Image data from imageHexData.dat (raw values generated by processImage.py)
 binarypic_raw = [241, 130, 132, 136, 240, 240, 240, 240]
@@ -72,12 +93,26 @@ data = {
     'blank': blank
 }
 
-def setup():
-    """Initialize GPIO pins for controlling the 74HC595 shift registers."""
+def setup(backendName=None):
+    """Initialize GPIO pins for controlling the 74HC595 shift registers.
+
+    Args:
+        backendName: 'bitbang' or 'spi' (default: OUTPUT_BACKEND)
+
+    Returns:
+        The output backend to pass to the display functions and to
+        matrixDriver.MatrixDriver. displayPattern() and destroy() fall back
+        to it when called without one.
+    """
+    global activeBackend
     GPIO.setmode(GPIO.BOARD)    # Use physical pin numbering
-    GPIO.setup(dataPin, GPIO.OUT)
     GPIO.setup(latchPin, GPIO.OUT)
-    GPIO.setup(clockPin, GPIO.OUT)
+    backend = createBackend(backendName or OUTPUT_BACKEND)
+    if isinstance(backend, BitBangBackend):
+        GPIO.setup(dataPin, GPIO.OUT)
+        GPIO.setup(clockPin, GPIO.OUT)
+    activeBackend = backend
+    return backend
 
 def shiftOut(dPin, cPin, order, val):
     """Shift out a byte of data to the 74HC595 shift register.
@@ -98,7 +133,186 @@ def shiftOut(dPin, cPin, order, val):
             GPIO.output(dPin, (0x80 & (val << i) == 0x80) and GPIO.HIGH or GPIO.LOW)
         GPIO.output(cPin, GPIO.HIGH)
 
-def displayPattern(pattern, duration):
+def encodeByte(val, order=MSBFIRST):
+    """Precompute the pin writes shiftOut() performs for one byte.
+
+    Returns (channels, values) tuples in the exact order shiftOut() would
+    write them: clock low, data bit, clock high for each of the 8 bits.
+    """
+    channels, values = [], []
+    for i in range(8):
+        if order == LSBFIRST:
+            bit = (val >> i) & 0x01
+        else:
+            bit = (val >> (7 - i)) & 0x01
+        channels += [clockPin, dataPin, clockPin]
+        values += [GPIO.LOW, GPIO.HIGH if bit else GPIO.LOW, GPIO.HIGH]
+    return tuple(channels), tuple(values)
+
+# Pin-level sequence for every possible byte, shifted out MSB first
+BYTE_SEQUENCES = [encodeByte(val) for val in range(256)]
+
+def compileRow(columns, rowSelect):
+    """Precompute one multiplexed row: latch low, column byte, row byte, latch high."""
+    colChannels, colValues = BYTE_SEQUENCES[columns & 0xFF]
+    rowChannels, rowValues = BYTE_SEQUENCES[rowSelect & 0xFF]
+    channels = (latchPin,) + colChannels + rowChannels + (latchPin,)
+    values = (GPIO.LOW,) + colValues + rowValues + (GPIO.HIGH,)
+    return channels, values
+
+class BitBangBackend:
+    """Shift rows out by toggling dataPin/clockPin through GPIO.
+
+    A compiled row is the (channels, values) pair from compileRow(), written
+    with a single list-form GPIO.output() call.
+    """
+    name = 'bitbang'
+
+    def compileRow(self, columns, rowSelect):
+        return compileRow(columns, rowSelect)
+
+    def writeRow(self, row):
+        GPIO.output(row[0], row[1])
+
+    def close(self):
+        pass
+
+class SpiBackend:
+    """Send rows through the hardware SPI controller with spidev.
+
+    A compiled row is its two bytes (column data, row selector), sent as one
+    SPI transfer followed by a single latch pulse. Pass spi to use an
+    already opened device (e.g. fakeSpidev.SpiDev()).
+    """
+    name = 'spi'
+
+    def __init__(self, spi=None, bus=SPI_BUS, device=SPI_DEVICE, speed=SPI_SPEED_HZ):
+        if spi is None:
+            if USE_FAKE:
+                import fakeSpidev as spidev
+            else:
+                import spidev
+            spi = spidev.SpiDev()
+            spi.open(bus, device)
+            spi.max_speed_hz = speed
+            spi.mode = 0        # 74HC595 shifts on the rising clock edge, MSB first
+        self.spi = spi
+        self._latch = ([latchPin, latchPin], [GPIO.LOW, GPIO.HIGH])
+
+    def compileRow(self, columns, rowSelect):
+        return [columns & 0xFF, rowSelect & 0xFF]
+
+    def writeRow(self, row):
+        self.spi.writebytes(row)
+        GPIO.output(*self._latch)
+
+    def close(self):
+        self.spi.close()
+
+def createBackend(name=OUTPUT_BACKEND):
+    """Create the output backend called name ('bitbang' or 'spi')."""
+    if name == 'bitbang':
+        return BitBangBackend()
+    if name == 'spi':
+        return SpiBackend()
+    raise ValueError(f"Unknown output backend: {name}")
+
+def compileScanPlan(pattern, backend):
+    """Build the full 8-row scan plan for a pattern.
+
+    Each entry is one row compiled by the output backend, so playing a row
+    is a single backend.writeRow() call (one GPIO.output() call instead of
+    50 separate ones when bit-banging). Build the plan once when the pattern
+    is set and replay it with playScanPlan() on the same backend.
+    """
+    # Row selector is inverted for common cathode; mask to a byte so the
+    # row-select value is never a negative Python int
+    return [backend.compileRow(pattern[i], ~(0x80 >> i) & 0xFF) for i in range(8)]
+
+def playScanPlan(plan, duration, backend, rowDwell=0.001):
+    """Replay a precompiled scan plan for the specified duration.
+
+    Args:
+        plan: Scan plan from compileScanPlan()
+        duration: Time in seconds to display the pattern
+        backend: Output backend the plan was compiled for
+        rowDwell: Time in seconds each row stays lit (persistence of vision)
+    """
+    writeRow = backend.writeRow
+    sleep = time.sleep
+    clock = time.time
+    start_time = clock()
+    while clock() - start_time < duration:
+        for row in plan:
+            writeRow(row)
+            sleep(rowDwell)
+
+def compileGrayPlan(levels, bits, backend):
+    """Precompute the bit-angle modulation (BAM) schedule for a grayscale frame.
+
+    Bit plane k of every row is shown for 2**k ticks, so a pixel's total on
+    time is proportional to its level. The schedule is built once when the
+    frame is loaded; playing it back is one backend.writeRow() call per entry.
+
+    Args:
+        levels: 8x8 brightness levels from 0 to 2**bits - 1, laid out like a
+            pattern (levels[i][j] is bit 7-j of row byte i)
+        bits: Bits per pixel (grayscale depth)
+        backend: Output backend that will play the schedule
+
+    Returns:
+        List of (compiled row, ticks), row by row, bit plane by bit plane.
+    """
+    levels = np.asarray(levels, dtype=np.uint8)
+    if levels.shape != (8, 8):
+        raise ValueError(f"Expected 8x8 levels, got shape {levels.shape}")
+    if not 1 <= bits <= 8 or levels.max() >= (1 << bits):
+        raise ValueError(f"Levels must fit in {bits} bits")
+    # planes[k][i] is the row byte of bit plane k for row i
+    planes = np.packbits((levels[np.newaxis] >> np.arange(bits, dtype=np.uint8)[:, None, None]) & 1,
+                         axis=-1)[..., 0]
+    plan = []
+    for i in range(8):
+        rowSelect = ~(0x80 >> i) & 0xFF
+        for k in range(bits):
+            plan.append((backend.compileRow(int(planes[k, i]), rowSelect), 1 << k))
+    return plan
+
+def playGrayPlan(plan, duration, backend, tick=0.0001):
+    """Replay a precompiled BAM schedule for the specified duration.
+
+    Args:
+        plan: Schedule from compileGrayPlan()
+        duration: Time in seconds to display the frame
+        backend: Output backend the schedule was compiled for
+        tick: Length in seconds of the least significant bit's slot
+    """
+    writeRow = backend.writeRow
+    sleep = time.sleep
+    clock = time.time
+    entries = [(row, ticks * tick) for row, ticks in plan]
+    start_time = clock()
+    while clock() - start_time < duration:
+        for row, dwell in entries:
+            writeRow(row)
+            sleep(dwell)
+
+def orientLevels(levels):
+    """Display orientation fix for an 8x8 grayscale image (see orientFrames)."""
+    return np.asarray(levels).T
+
+def displayGray(levels, bits, duration, backend):
+    """Display an 8x8 grayscale image (levels 0 .. 2**bits - 1, image layout)."""
+    playGrayPlan(compileGrayPlan(orientLevels(levels), bits, backend), duration, backend)
+
+def _resolveBackend(backend):
+    if backend is not None:
+        return backend
+    if activeBackend is None:
+        raise RuntimeError("No output backend: call setup() first or pass one")
+    return activeBackend
+
+def displayPattern(pattern, duration, backend=None):
     """Display a pattern on the LED matrix for the specified duration.
     
     Uses multiplexing to rapidly scan through rows, creating the illusion
@@ -107,24 +321,12 @@ def displayPattern(pattern, duration):
     Args:
         pattern: List of 8 bytes, each representing one row of the 8x8 matrix
         duration: Time in seconds to display the pattern
+        backend: Output backend (default: the one returned by setup())
     """
-    start_time = time.time()
-    while time.time() - start_time < duration:
-        x = 0x80  # Start with first row (binary 10000000)
-        for i in range(0, 8):
-            # Latch low to prepare for data transfer
-            GPIO.output(latchPin, GPIO.LOW)
-            # Shift out column data (which LEDs in this row should be on)
-            shiftOut(dataPin, clockPin, MSBFIRST, pattern[i])
-            # Shift out row selector (which row to activate)
-            shiftOut(dataPin, clockPin, MSBFIRST, ~x)  # Inverted for common cathode
-            # Latch high to display the data
-            GPIO.output(latchPin, GPIO.HIGH)
-            # Brief delay for multiplexing (persistence of vision)
-            time.sleep(0.001)
-            x >>= 1  # Move to next row
-
-def loop():
+    backend = _resolveBackend(backend)
+    playScanPlan(compileScanPlan(pattern, backend), duration, backend)
+
+def loop(backend):
     """Main display loop: cycles through all three edge detection methods.
     
     Sequence:
@@ -132,30 +334,88 @@ def loop():
     - S (2s) → Sobel Edges (10s) → Blank (0.5s)
     - C (2s) → Canny Edges (10s) → Blank (0.5s)
     """
+    # Scan plans are compiled once here, not on every displayPattern() call
+    plans = {name: compileScanPlan(pattern, backend) for name, pattern in data.items()}
     while True:
         # Display Binary Original
-        displayPattern(data['B'], 2)
-        displayPattern(data['binarypic'], 10)
-        displayPattern(data['blank'], 0.5)
+        playScanPlan(plans['B'], 2, backend)
+        playScanPlan(plans['binarypic'], 10, backend)
+        playScanPlan(plans['blank'], 0.5, backend)
         
         # Display Sobel Edge Detection
-        displayPattern(data['S'], 2)
-        displayPattern(data['sobelpic'], 10)
-        displayPattern(data['blank'], 0.5)
+        playScanPlan(plans['S'], 2, backend)
+        playScanPlan(plans['sobelpic'], 10, backend)
+        playScanPlan(plans['blank'], 0.5, backend)
         
         # Display Canny Edge Detection
-        displayPattern(data['C'], 2)
-        displayPattern(data['cannypic'], 10)
-        displayPattern(data['blank'], 0.5)
+        playScanPlan(plans['C'], 2, backend)
+        playScanPlan(plans['cannypic'], 10, backend)
+        playScanPlan(plans['blank'], 0.5, backend)
+
+def loadFrameFile(path):
+    """Memory-map a packed frame file written by batchFrames.py.
+
+    Returns a frameFile.FrameFile; frames[i] is the raw (un-oriented) row
+    data of frame i, and index[i] describes where it came from.
+    """
+    return frameFile.FrameFile(path)
+
+def playFrameFile(path, backend, duration=2, repeat=True):
+    """Play every frame of a packed frame file straight from the memory map.
+
+    Args:
+        path: Frame file written by batchFrames.py
+        backend: Output backend from setup()
+        duration: Time in seconds to show each frame
+        repeat: Loop over the file forever when True
+    """
+    frames = loadFrameFile(path)
+    if len(frames) == 0:
+        print(f"{path} contains no frames")
+        return
+    while True:
+        for i in range(len(frames)):
+            # Same orientation fix as the hard-coded pictures above
+            displayPattern(orientFrames(frames[i]).tolist(), duration, backend)
+        if not repeat:
+            break
+
+def playVideo(path, backend, fps=10):
+    """Stream a video clip to the matrix at the given frame rate.
+
+    Decoding and 8x8 reduction run on videoFrames.VideoFrameStream's worker
+    thread and the matrix is scanned by matrixDriver.MatrixDriver's refresh
+    thread; this loop only swaps finished frames in, so frame changes never
+    interrupt the scan.
+    """
+    import matrixDriver  # imports this module, so not at the top
+
+    with videoFrames.VideoFrameStream(path, target_fps=fps) as stream, \
+            matrixDriver.MatrixDriver(backend) as driver:
+        next_frame = time.perf_counter()
+        for rows in stream:
+            driver.show(orientFrames(rows).tolist())
+            next_frame += 1.0 / fps
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
+        videoFrames.printStats(stream.stats())
+        matrixDriver.printStats(driver.stats())
 
-def destroy():
-    """Clean up GPIO resources before exiting."""
+def destroy(backend=None):
+    """Clean up the output backend and GPIO resources before exiting."""
+    _resolveBackend(backend).close()
     GPIO.cleanup()
 
 if __name__ == '__main__':
     print('Program is starting...')
-    setup()
+    backend = setup()
     try:
-        loop()
+        if len(sys.argv) > 1 and sys.argv[1].endswith('.led'):
+            # python ledMatrix.py frames.led  -> play a batchFrames.py file
+            playFrameFile(sys.argv[1], backend)
+        elif len(sys.argv) > 1:
+            # python ledMatrix.py clip.mp4  -> stream a video
+            playVideo(sys.argv[1], backend)
+        else:
+            loop(backend)
     except KeyboardInterrupt:
-        destroy()
\ No newline at end of file
+        destroy(backend)
\ No newline at end of file
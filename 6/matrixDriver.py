@@ -0,0 +1,223 @@
+"""Double-buffered LED matrix driver with a dedicated refresh thread.
+
+ledMatrix.displayPattern() owns the calling thread for the whole display
+time. MatrixDriver instead scans a front buffer on its own thread at a
+constant rate, while the application fills the back buffer and calls
+swap(). The swap takes effect at the next frame boundary, so the scan is
+never restarted or cut off halfway through a frame.
+
+    driver = MatrixDriver(ledMatrix.setup(), refreshRate=100).start()
+    driver.show(ledMatrix.letter_B)        # load back buffer + swap
+    driver.showGray(levels, bits=3)        # grayscale (bit-angle modulation)
+    ...
+    print(driver.stats())
+    driver.stop()
+
+Run this file directly (with LED_MATRIX_FAKE=1 off the Pi) to measure the
+driver with fakeGPIO.
+"""
+
+import math
+import threading
+import time
+
+import ledMatrix
+
+
+class MatrixDriver:
+    """Scan the front buffer at a constant refresh rate on a background thread."""
+
+    def __init__(self, backend, refreshRate=100):
+        """
+        Args:
+            backend: Output backend from ledMatrix.setup() (or one created
+                with ledMatrix.createBackend()); every schedule is compiled
+                for and written through it
+            refreshRate: Full-frame scans per second (each frame is 8 rows)
+        """
+        self.backend = backend
+        self.refreshRate = refreshRate
+        self.framePeriod = 1.0 / refreshRate
+        blank = self._schedule([(row, 1) for row in ledMatrix.compileScanPlan([0] * 8, backend)])
+        self._front = blank
+        self._back = blank
+        self._lock = threading.Lock()
+        self._swapped = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._resetStats()
+
+    def _resetStats(self):
+        self.frames = 0
+        self.rows = 0
+        self.swaps = 0
+        self.missedRefreshes = 0
+        # Running row-dwell statistics (Welford)
+        self._dwellCount = 0
+        self._dwellTotal = 0.0
+        self._dwellMean = 0.0
+        self._dwellM2 = 0.0
+        self._dwellMaxError = 0.0
+
+    def _schedule(self, plan):
+        # (compiled row, seconds) entries; the ticks of one frame add up to
+        # exactly one frame period
+        tick = self.framePeriod / sum(ticks for _, ticks in plan)
+        return [(row, ticks * tick) for row, ticks in plan]
+
+    def compile(self, pattern):
+        """Precompile a pattern (list of 8 row bytes) for loadCompiled()."""
+        return self._schedule([(row, 1) for row in ledMatrix.compileScanPlan(pattern, self.backend)])
+
+    def load(self, pattern):
+        """Compile a pattern (list of 8 row bytes) into the back buffer."""
+        self.loadCompiled(self.compile(pattern))
+
+    def loadCompiled(self, schedule):
+        """Put a schedule from compile() into the back buffer as-is."""
+        with self._lock:
+            self._back = schedule
+
+    def loadGray(self, levels, bits):
+        """Compile 8x8 grayscale levels (pattern layout) into the back buffer.
+
+        The BAM schedule from ledMatrix.compileGrayPlan() is precomputed
+        here, so the refresh thread only replays it.
+        """
+        self.loadCompiled(self._schedule(ledMatrix.compileGrayPlan(levels, bits, self.backend)))
+
+    def swap(self, wait=False):
+        """Atomically exchange the front and back buffers.
+
+        The refresh thread picks up the new front buffer at the start of its
+        next frame. With wait=True, block until that has happened.
+        """
+        with self._lock:
+            self._front, self._back = self._back, self._front
+            self.swaps += 1
+            self._swapped.clear()
+        if wait and self._thread is not None:
+            self._swapped.wait()
+
+    def show(self, pattern, wait=False):
+        """Load a pattern into the back buffer and swap it to the front."""
+        self.load(pattern)
+        self.swap(wait)
+
+    def showGray(self, levels, bits, wait=False):
+        """Load grayscale levels into the back buffer and swap them to the front."""
+        self.loadGray(levels, bits)
+        self.swap(wait)
+
+    def start(self):
+        self._stop.clear()
+        self._resetStats()
+        self._thread = threading.Thread(target=self._run, name="matrix-refresh", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop scanning and blank the matrix."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for row in ledMatrix.compileScanPlan([0] * 8, self.backend):
+            self.backend.writeRow(row)
+
+    @property
+    def rowPeriod(self):
+        """Nominal time per schedule entry of the current front buffer."""
+        return self.framePeriod / len(self._front)
+
+    def _run(self):
+        writeRow = self.backend.writeRow
+        clock = time.perf_counter
+        sleep = time.sleep
+        framePeriod = self.framePeriod
+        deadline = clock()
+        lastRow = None
+        lastDwell = 0.0
+        while not self._stop.is_set():
+            # Read once per frame so swaps land on frame boundaries; the event
+            # is set under the same lock so swap(wait=True) cannot see the
+            # old schedule reported as the new one
+            with self._lock:
+                schedule = self._front
+                self._swapped.set()
+            for row, dwell in schedule:
+                now = clock()
+                if deadline > now:
+                    sleep(deadline - now)
+                    now = clock()
+                writeRow(row)
+                if lastRow is not None:
+                    self._recordDwell(now - lastRow, lastDwell)
+                lastRow = now
+                lastDwell = dwell
+                deadline += dwell
+            self.frames += 1
+            self.rows += len(schedule)
+            # A whole frame behind schedule: count it as missed and resync
+            # instead of bursting rows to catch up
+            behind = clock() - deadline
+            if behind > framePeriod:
+                self.missedRefreshes += int(behind // framePeriod)
+                deadline = clock()
+
+    def _recordDwell(self, dwell, nominal):
+        # Statistics are kept on the error against the nominal dwell, so BAM
+        # slots of different lengths are comparable
+        error = dwell - nominal
+        self._dwellCount += 1
+        self._dwellTotal += dwell
+        delta = error - self._dwellMean
+        self._dwellMean += delta / self._dwellCount
+        self._dwellM2 += delta * (error - self._dwellMean)
+        self._dwellMaxError = max(self._dwellMaxError, abs(error))
+
+    def stats(self):
+        """Refresh statistics since start().
+
+        Row dwell is the time between consecutive row latches (schedule
+        entries for grayscale frames); jitter is the standard deviation of
+        its error against the nominal dwell and maxError the largest error.
+        """
+        n = max(self._dwellCount, 1)
+        return {
+            'refreshRate': self.refreshRate,
+            'frames': self.frames,
+            'swaps': self.swaps,
+            'missedRefreshes': self.missedRefreshes,
+            'rowPeriodUs': self.rowPeriod * 1e6,
+            'rowDwellUs': self._dwellTotal / n * 1e6,
+            'rowJitterUs': math.sqrt(self._dwellM2 / n) * 1e6,
+            'rowMaxErrorUs': self._dwellMaxError * 1e6,
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def printStats(stats):
+    print(f"Refresh:       {stats['frames']} frames at {stats['refreshRate']} Hz target, "
+          f"{stats['missedRefreshes']} missed")
+    print(f"Swaps:         {stats['swaps']}")
+    print(f"Row dwell:     {stats['rowDwellUs']:.1f} us (nominal {stats['rowPeriodUs']:.1f} us)")
+    print(f"Row jitter:    {stats['rowJitterUs']:.1f} us std, {stats['rowMaxErrorUs']:.1f} us max error")
+
+
+if __name__ == '__main__':
+    # Swap between the labelled pictures while the refresh thread keeps scanning
+    backend = ledMatrix.setup()
+    try:
+        with MatrixDriver(backend, refreshRate=100) as driver:
+            for name in ('B', 'binarypic', 'S', 'sobelpic', 'C', 'cannypic'):
+                driver.show(ledMatrix.data[name])
+                time.sleep(0.5)
+            printStats(driver.stats())
+    finally:
+        ledMatrix.destroy(backend)
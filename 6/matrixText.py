@@ -0,0 +1,228 @@
+"""Precompiled scrolling text and animation sequences for the LED matrix.
+
+FONT is a 5x7 column font covering printable ASCII (the same column
+format as ledMatrix.letter_B/S/C: one byte per column, bit 0 = top row).
+compileText() renders a string into a scrolling FrameSequence and
+compileScript() strings text, fixed patterns and pauses together. Both
+are cached by their arguments, so replaying a message costs nothing.
+
+Playback (playSequence) only indexes into the precompiled frames: every
+distinct frame's scan schedule is compiled once up front and swapped into
+a matrixDriver.MatrixDriver on schedule.
+
+    python matrixText.py "HELLO ESSE 2220"
+"""
+
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+
+import frame64
+
+FRAME_RATE = 50     # playback ticks per second
+CHAR_SPACING = 1    # blank columns between characters
+SPACE_WIDTH = 3     # columns used for ' '
+
+# 5x7 font, printable ASCII 0x20-0x7E, one byte per column (bit 0 = top)
+_FONT_DATA = [
+    (0x00, 0x00, 0x00, 0x00, 0x00), (0x00, 0x00, 0x5F, 0x00, 0x00),  # ' ' !
+    (0x00, 0x07, 0x00, 0x07, 0x00), (0x14, 0x7F, 0x14, 0x7F, 0x14),  # " #
+    (0x24, 0x2A, 0x7F, 0x2A, 0x12), (0x23, 0x13, 0x08, 0x64, 0x62),  # $ %
+    (0x36, 0x49, 0x55, 0x22, 0x50), (0x00, 0x05, 0x03, 0x00, 0x00),  # & '
+    (0x00, 0x1C, 0x22, 0x41, 0x00), (0x00, 0x41, 0x22, 0x1C, 0x00),  # ( )
+    (0x14, 0x08, 0x3E, 0x08, 0x14), (0x08, 0x08, 0x3E, 0x08, 0x08),  # * +
+    (0x00, 0x50, 0x30, 0x00, 0x00), (0x08, 0x08, 0x08, 0x08, 0x08),  # , -
+    (0x00, 0x60, 0x60, 0x00, 0x00), (0x20, 0x10, 0x08, 0x04, 0x02),  # . /
+    (0x3E, 0x51, 0x49, 0x45, 0x3E), (0x00, 0x42, 0x7F, 0x40, 0x00),  # 0 1
+    (0x42, 0x61, 0x51, 0x49, 0x46), (0x21, 0x41, 0x45, 0x4B, 0x31),  # 2 3
+    (0x18, 0x14, 0x12, 0x7F, 0x10), (0x27, 0x45, 0x45, 0x45, 0x39),  # 4 5
+    (0x3C, 0x4A, 0x49, 0x49, 0x30), (0x01, 0x71, 0x09, 0x05, 0x03),  # 6 7
+    (0x36, 0x49, 0x49, 0x49, 0x36), (0x06, 0x49, 0x49, 0x29, 0x1E),  # 8 9
+    (0x00, 0x36, 0x36, 0x00, 0x00), (0x00, 0x56, 0x36, 0x00, 0x00),  # : ;
+    (0x08, 0x14, 0x22, 0x41, 0x00), (0x14, 0x14, 0x14, 0x14, 0x14),  # < =
+    (0x00, 0x41, 0x22, 0x14, 0x08), (0x02, 0x01, 0x51, 0x09, 0x06),  # > ?
+    (0x32, 0x49, 0x79, 0x41, 0x3E), (0x7E, 0x11, 0x11, 0x11, 0x7E),  # @ A
+    (0x7F, 0x49, 0x49, 0x49, 0x36), (0x3E, 0x41, 0x41, 0x41, 0x22),  # B C
+    (0x7F, 0x41, 0x41, 0x22, 0x1C), (0x7F, 0x49, 0x49, 0x49, 0x41),  # D E
+    (0x7F, 0x09, 0x09, 0x09, 0x01), (0x3E, 0x41, 0x49, 0x49, 0x7A),  # F G
+    (0x7F, 0x08, 0x08, 0x08, 0x7F), (0x00, 0x41, 0x7F, 0x41, 0x00),  # H I
+    (0x20, 0x40, 0x41, 0x3F, 0x01), (0x7F, 0x08, 0x14, 0x22, 0x41),  # J K
+    (0x7F, 0x40, 0x40, 0x40, 0x40), (0x7F, 0x02, 0x0C, 0x02, 0x7F),  # L M
+    (0x7F, 0x04, 0x08, 0x10, 0x7F), (0x3E, 0x41, 0x41, 0x41, 0x3E),  # N O
+    (0x7F, 0x09, 0x09, 0x09, 0x06), (0x3E, 0x41, 0x51, 0x21, 0x5E),  # P Q
+    (0x7F, 0x09, 0x19, 0x29, 0x46), (0x46, 0x49, 0x49, 0x49, 0x31),  # R S
+    (0x01, 0x01, 0x7F, 0x01, 0x01), (0x3F, 0x40, 0x40, 0x40, 0x3F),  # T U
+    (0x1F, 0x20, 0x40, 0x20, 0x1F), (0x3F, 0x40, 0x38, 0x40, 0x3F),  # V W
+    (0x63, 0x14, 0x08, 0x14, 0x63), (0x07, 0x08, 0x70, 0x08, 0x07),  # X Y
+    (0x61, 0x51, 0x49, 0x45, 0x43), (0x00, 0x7F, 0x41, 0x41, 0x00),  # Z [
+    (0x02, 0x04, 0x08, 0x10, 0x20), (0x00, 0x41, 0x41, 0x7F, 0x00),  # \ ]
+    (0x04, 0x02, 0x01, 0x02, 0x04), (0x40, 0x40, 0x40, 0x40, 0x40),  # ^ _
+    (0x00, 0x01, 0x02, 0x04, 0x00), (0x20, 0x54, 0x54, 0x54, 0x78),  # ` a
+    (0x7F, 0x48, 0x44, 0x44, 0x38), (0x38, 0x44, 0x44, 0x44, 0x20),  # b c
+    (0x38, 0x44, 0x44, 0x48, 0x7F), (0x38, 0x54, 0x54, 0x54, 0x18),  # d e
+    (0x08, 0x7E, 0x09, 0x01, 0x02), (0x0C, 0x52, 0x52, 0x52, 0x3E),  # f g
+    (0x7F, 0x08, 0x04, 0x04, 0x78), (0x00, 0x44, 0x7D, 0x40, 0x00),  # h i
+    (0x20, 0x40, 0x44, 0x3D, 0x00), (0x7F, 0x10, 0x28, 0x44, 0x00),  # j k
+    (0x00, 0x41, 0x7F, 0x40, 0x00), (0x7C, 0x04, 0x18, 0x04, 0x78),  # l m
+    (0x7C, 0x08, 0x04, 0x04, 0x78), (0x38, 0x44, 0x44, 0x44, 0x38),  # n o
+    (0x7C, 0x14, 0x14, 0x14, 0x08), (0x08, 0x14, 0x14, 0x18, 0x7C),  # p q
+    (0x7C, 0x08, 0x04, 0x04, 0x08), (0x48, 0x54, 0x54, 0x54, 0x20),  # r s
+    (0x04, 0x3F, 0x44, 0x40, 0x20), (0x3C, 0x40, 0x40, 0x20, 0x7C),  # t u
+    (0x1C, 0x20, 0x40, 0x20, 0x1C), (0x3C, 0x40, 0x30, 0x40, 0x3C),  # v w
+    (0x44, 0x28, 0x10, 0x28, 0x44), (0x0C, 0x50, 0x50, 0x50, 0x3C),  # x y
+    (0x44, 0x64, 0x54, 0x4C, 0x44), (0x00, 0x08, 0x36, 0x41, 0x00),  # z {
+    (0x00, 0x00, 0x7F, 0x00, 0x00), (0x00, 0x41, 0x36, 0x08, 0x00),  # | }
+    (0x10, 0x08, 0x08, 0x10, 0x08),                                  # ~
+]
+
+
+def _trim(columns):
+    # Proportional spacing: drop blank columns on both sides of a glyph
+    columns = list(columns)
+    while columns and columns[0] == 0:
+        columns.pop(0)
+    while columns and columns[-1] == 0:
+        columns.pop()
+    return tuple(columns)
+
+
+FONT = {chr(0x20 + i): _trim(glyph) for i, glyph in enumerate(_FONT_DATA)}
+FONT[' '] = (0x00,) * SPACE_WIDTH
+
+
+class FrameSequence:
+    """A precompiled run of matrix frames.
+
+    frames is an (N, 8) uint8 array of patterns in display layout (what
+    ledMatrix.displayPattern() takes) and ticks[i] how many FRAME_RATE
+    ticks frame i stays up. Both arrays are read-only so cached sequences
+    can be shared safely.
+    """
+
+    def __init__(self, frames, ticks):
+        self.frames = np.ascontiguousarray(frames, dtype=np.uint8).reshape(-1, 8)
+        self.ticks = np.asarray(ticks, dtype=np.int64).reshape(-1)
+        if len(self.frames) != len(self.ticks):
+            raise ValueError("Every frame needs a tick count")
+        self.frames.setflags(write=False)
+        self.ticks.setflags(write=False)
+        self._ends = np.cumsum(self.ticks)
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def duration(self):
+        """Playback time in seconds."""
+        return int(self.ticks.sum()) / FRAME_RATE
+
+    def frameAt(self, tick):
+        """Frame shown at a given playback tick (wraps around)."""
+        return self.frames[np.searchsorted(self._ends, tick % self._ends[-1], side='right')]
+
+
+def textColumns(text):
+    """Render text into display column bytes (bit 7 = top row).
+
+    The font stores bit 0 as the top row; on this matrix that shows upside
+    down (see ledMatrix.letter_S), so every column goes through the bit
+    reversal table. Characters missing from the font render as '?'.
+    """
+    columns = []
+    for ch in text:
+        columns.extend(FONT.get(ch, FONT['?']))
+        columns.extend([0] * CHAR_SPACING)
+    return frame64.REVERSE_TABLE[np.array(columns, dtype=np.uint8)]
+
+
+@lru_cache(maxsize=64)
+def compileText(text, speed=10):
+    """Compile a scrolling message into a FrameSequence.
+
+    The text enters from the right and scrolls fully off to the left.
+
+    Args:
+        text: Message to scroll
+        speed: Scroll speed in columns per second
+    """
+    strip = np.concatenate([np.zeros(8, np.uint8), textColumns(text), np.zeros(8, np.uint8)])
+    windows = np.lib.stride_tricks.sliding_window_view(strip, 8)
+    hold = max(1, round(FRAME_RATE / speed))
+    return FrameSequence(windows, np.full(len(windows), hold))
+
+
+def compileScript(script):
+    """Compile an animation script into one FrameSequence.
+
+    Each step is one of:
+        ('text', message, speed)     scroll a message (speed in columns/s)
+        ('pattern', rows, seconds)   hold an 8-byte pattern
+        ('blank', seconds)           blank the matrix
+    """
+    return _compileScript(tuple(
+        (step[0], tuple(step[1]), step[2]) if step[0] == 'pattern' else tuple(step)
+        for step in script))
+
+
+@lru_cache(maxsize=64)
+def _compileScript(script):
+    frames, ticks = [], []
+    for step in script:
+        kind = step[0]
+        if kind == 'text':
+            sequence = compileText(step[1], step[2])
+            frames.append(sequence.frames)
+            ticks.append(sequence.ticks)
+        elif kind in ('pattern', 'blank'):
+            rows, seconds = (step[1], step[2]) if kind == 'pattern' else ((0,) * 8, step[1])
+            frames.append(np.array([rows], dtype=np.uint8))
+            ticks.append([max(1, round(seconds * FRAME_RATE))])
+        else:
+            raise ValueError(f"Unknown script step: {kind}")
+    return FrameSequence(np.concatenate(frames), np.concatenate(ticks))
+
+
+def playSequence(sequence, driver, repeat=1):
+    """Play a FrameSequence on a running matrixDriver.MatrixDriver.
+
+    Every distinct frame's schedule is compiled once before playback
+    starts (scrolling text and held patterns repeat frames); the loop itself
+    only swaps precompiled schedules in and sleeps.
+    """
+    compiled = {}
+    schedules = []
+    for frame in sequence.frames:
+        key = frame.tobytes()
+        if key not in compiled:
+            compiled[key] = driver.compile(frame.tolist())
+        schedules.append(compiled[key])
+    holds = (sequence.ticks / FRAME_RATE).tolist()
+    nextFrame = time.perf_counter()
+    for _ in range(repeat):
+        for schedule, hold in zip(schedules, holds):
+            driver.loadCompiled(schedule)
+            driver.swap()
+            nextFrame += hold
+            time.sleep(max(0.0, nextFrame - time.perf_counter()))
+
+
+if __name__ == '__main__':
+    import ledMatrix
+    import matrixDriver
+
+    message = sys.argv[1] if len(sys.argv) > 1 else "ESSE 2220"
+    sequence = compileScript([
+        ('text', message, 15),
+        ('pattern', ledMatrix.sobelpic, 1),
+        ('blank', 0.5),
+    ])
+    print(f"{len(sequence)} frames, {sequence.duration:.1f} s")
+    backend = ledMatrix.setup()
+    try:
+        with matrixDriver.MatrixDriver(backend) as driver:
+            playSequence(sequence, driver)
+            matrixDriver.printStats(driver.stats())
+    finally:
+        ledMatrix.destroy(backend)
@@ -1,9 +1,19 @@
+import sys
+from pathlib import Path
+
 import cv2
 import numpy as np
 
+import hexPacking
+
+# Repository root, so the shared helpers in common/ can be imported
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.image_loader import imread
+from common.image_writer import BackgroundImageWriter
+
 def loadImage(path):
-    """Load an image from the specified file path."""
-    image = cv2.imread(path)
+    """Load an image from the specified file path (decoded once, then cached)."""
+    image = imread(path)
     if image is None:
         raise FileNotFoundError(f"Image not found at path: {path}")
     return image
@@ -79,144 +89,145 @@ def convertToHex(binary_image, reverse_bits=False):
     print("================================\n")
     return hex_data
 
+# Preview file written for each pipeline stage (all upscaled for viewing)
+PREVIEW_FILES = {
+    'original': "output_original_8x8.png",
+    'sobel': "output_sobel_8x8.png",
+    'canny': "output_canny_8x8.png",
+    'binarypic': "output_binary_original.png",
+    'sobelpic': "output_binary_sobel.png",
+    'cannypic': "output_binary_canny.png",
+}
+
+def processToBinary(image, invert=True, threshold=127):
+    """Run the resize -> Sobel/Canny -> threshold pipeline entirely in memory.
+
+    Args:
+        image: Source image (grayscale or BGR)
+        invert: Invert the binary of the original image (dark pixels = LED on)
+        threshold: Binarization threshold for all three outputs
+
+    Returns:
+        (stages, binaries): stages maps 'original', 'sobel', 'canny' to the
+        8x8 grayscale results; binaries maps 'binarypic', 'sobelpic',
+        'cannypic' to the matching 8x8 0/1 images.
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    resized_8x8 = resizeImage(image, (8, 8))
+    stages = {
+        'original': resized_8x8,
+        'sobel': sobel(resized_8x8),
+        'canny': canny(resized_8x8),
+    }
+    binaries = {
+        'binarypic': convertToBinary(stages['original'], threshold=threshold, invert=invert),
+        'sobelpic': convertToBinary(stages['sobel'], threshold=threshold),
+        'cannypic': convertToBinary(stages['canny'], threshold=threshold),
+    }
+    return stages, binaries
+
+def imageToGray(image, bits=4, invert=True):
+    """Reduce an image to 8x8 brightness levels for ledMatrix's grayscale mode.
+
+    Args:
+        image: Source image (grayscale or BGR)
+        bits: Bits per pixel, i.e. levels from 0 to 2**bits - 1
+        invert: Dark pixels = bright LED, like the inverted binary original
+
+    Returns:
+        8x8 uint8 array of levels in image layout.
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    resized_8x8 = resizeImage(image, (8, 8))
+    if invert:
+        resized_8x8 = 255 - resized_8x8
+    return resized_8x8 >> (8 - bits)
+
+def imageToFrames(image, invert=True, threshold=127, reverse_bits=False,
+                  preview_writer=None, scale_factor=30, return_stages=False):
+    """Convert a source image straight to LED matrix hex frames.
+
+    Replaces the old write PNG -> read PNG -> downscale -> re-threshold
+    round trip: the 8x8 binary results are packed directly.
+
+    Args:
+        image: Source image (grayscale or BGR)
+        invert: Invert the binary of the original image (dark pixels = LED on)
+        threshold: Binarization threshold
+        reverse_bits: If True, reverse the bit order in each row (MSB<->LSB)
+        preview_writer: Optional BackgroundImageWriter; when given, the
+            upscaled preview PNGs are queued on it and written off-thread
+        scale_factor: Upscale factor for the preview PNGs
+        return_stages: Also return the intermediate 8x8 images
+
+    Returns:
+        Dict mapping 'binarypic', 'sobelpic', 'cannypic' to lists of 8 ints
+        (the format ledMatrix.py expects). With return_stages=True,
+        (frames, stages, binaries) with stages and binaries as returned by
+        processToBinary().
+    """
+    stages, binaries = processToBinary(image, invert=invert, threshold=threshold)
+
+    if preview_writer is not None:
+        for name, img in stages.items():
+            preview_writer.write(PREVIEW_FILES[name], img, scale=scale_factor)
+        for name, img in binaries.items():
+            preview_writer.write(PREVIEW_FILES[name], img * 255, scale=scale_factor)
+
+    names = list(binaries)
+    packed = hexPacking.convertToHexBatch(np.stack([binaries[n] for n in names]), reverse_bits)
+    frames = {name: row_bytes.tolist() for name, row_bytes in zip(names, packed)}
+    if return_stages:
+        return frames, stages, binaries
+    return frames
+
 if __name__ == '__main__':
     print('Program is starting...')
     try:
         # Load the input image
         image = loadImage("lab6_8x8_gray.png")
-        gray_image = image  # Image provided is already grayscale
-        
-        # FIRST: Resize to 8x8 (LED matrix dimensions)
-        resized_8x8 = resizeImage(gray_image, (8, 8))
-        
-        # THEN: Apply edge detection algorithms on the 8x8 image
-        sobel_8x8 = sobel(resized_8x8)
-        canny_8x8 = canny(resized_8x8)
-        
-        # Create upscaled versions for better viewing (scale 8x8 to 240x240)
-        scale_factor = 30
-        original_large = cv2.resize(resized_8x8, (8 * scale_factor, 8 * scale_factor), 
-                                   interpolation=cv2.INTER_NEAREST)
-        sobel_large = cv2.resize(sobel_8x8, (8 * scale_factor, 8 * scale_factor), 
-                                interpolation=cv2.INTER_NEAREST)
-        canny_large = cv2.resize(canny_8x8, (8 * scale_factor, 8 * scale_factor), 
-                                interpolation=cv2.INTER_NEAREST)
-        
-        # Print pixel value ranges for debugging
-        print("\n=== Pixel Value Ranges (for debugging) ===")
-        print(f"Original 8x8:   min={resized_8x8.min()}, max={resized_8x8.max()}")
-        print(f"Sobel 8x8:      min={sobel_8x8.min()}, max={sobel_8x8.max()}")
-        print(f"Canny 8x8:      min={canny_8x8.min()}, max={canny_8x8.max()}")
-        
-        # Convert all methods to binary for comparison
+
         # Set invert=True if you want dark pixels in image = LED on
         invert_binary = True  # Change to False if LEDs should match white pixels
-        
-        binary_original = convertToBinary(resized_8x8, threshold=127, invert=invert_binary)
-        binary_sobel = convertToBinary(sobel_8x8, threshold=127, invert=False)
-        binary_canny = convertToBinary(canny_8x8, threshold=127, invert=False)
-        
-        print(f"Binary original (inverted={invert_binary}): min={binary_original.min()}, max={binary_original.max()}")
-        print(f"Binary sobel:    min={binary_sobel.min()}, max={binary_sobel.max()}")
-        print(f"Binary canny:    min={binary_canny.min()}, max={binary_canny.max()}")
-        
-        # Print actual 8x8 binary pattern for original
-        print("\n8x8 Binary Original Pattern (1=LED on, 0=LED off):")
-        for row in binary_original:
-            row_flat = row.flatten() if len(row.shape) > 1 else row
-            print(''.join(str(int(pixel)) for pixel in row_flat))
-        print("==========================================\n")
-        
-        # Create scaled versions for display
-        binary_original_large = cv2.resize(binary_original * 255, 
-                                          (8 * scale_factor, 8 * scale_factor), 
-                                          interpolation=cv2.INTER_NEAREST)
-        binary_sobel_large = cv2.resize(binary_sobel * 255, 
-                                       (8 * scale_factor, 8 * scale_factor), 
-                                       interpolation=cv2.INTER_NEAREST)
-        binary_canny_large = cv2.resize(binary_canny * 255, 
-                                       (8 * scale_factor, 8 * scale_factor), 
-                                       interpolation=cv2.INTER_NEAREST)
-        
-        # Save all images to files for documentation
-        cv2.imwrite("output_original_8x8.png", original_large)
-        cv2.imwrite("output_sobel_8x8.png", sobel_large)
-        cv2.imwrite("output_canny_8x8.png", canny_large)
-        cv2.imwrite("output_binary_original.png", binary_original_large)
-        cv2.imwrite("output_binary_sobel.png", binary_sobel_large)
-        cv2.imwrite("output_binary_canny.png", binary_canny_large)
-        
-        print("Images saved (all scaled up 30x for viewing):")
-        print("  - output_original_8x8.png (Original resized to 8x8)")
-        print("  - output_sobel_8x8.png (Sobel edge detection on 8x8)")
-        print("  - output_canny_8x8.png (Canny edge detection on 8x8)")
-        print("  - output_binary_original.png (Binary of original)")
-        print("  - output_binary_sobel.png (Binary of Sobel - for LED)")
-        print("  - output_binary_canny.png (Binary of Canny - for LED)")
-        
-        # Display images in windows
-        cv2.imshow("1. Original 8x8", original_large)
-        cv2.imshow("2. Sobel 8x8", sobel_large)
-        cv2.imshow("3. Canny 8x8", canny_large)
-        cv2.imshow("4. Binary Original", binary_original_large)
-        cv2.imshow("5. Binary Sobel", binary_sobel_large)
-        cv2.imshow("6. Binary Canny", binary_canny_large)
-        
-        # Convert saved images to hex data for LED matrix
-        print("\n=== Converting SAVED images back to hex data ===")
-        
-        # Read back the saved binary images
-        saved_binary_original = cv2.imread("output_binary_original.png", cv2.IMREAD_GRAYSCALE)
-        saved_binary_sobel = cv2.imread("output_binary_sobel.png", cv2.IMREAD_GRAYSCALE)
-        saved_binary_canny = cv2.imread("output_binary_canny.png", cv2.IMREAD_GRAYSCALE)
-        
-        # Downscale back to 8x8
-        saved_binary_original_8x8 = cv2.resize(saved_binary_original, (8, 8), 
-                                              interpolation=cv2.INTER_NEAREST)
-        saved_binary_sobel_8x8 = cv2.resize(saved_binary_sobel, (8, 8), 
-                                           interpolation=cv2.INTER_NEAREST)
-        saved_binary_canny_8x8 = cv2.resize(saved_binary_canny, (8, 8), 
-                                           interpolation=cv2.INTER_NEAREST)
-        
-        # Convert back to binary (0 and 1)
-        _, saved_binary_original_8x8 = cv2.threshold(saved_binary_original_8x8, 127, 1, 
-                                                     cv2.THRESH_BINARY)
-        _, saved_binary_sobel_8x8 = cv2.threshold(saved_binary_sobel_8x8, 127, 1, 
-                                                  cv2.THRESH_BINARY)
-        _, saved_binary_canny_8x8 = cv2.threshold(saved_binary_canny_8x8, 127, 1, 
-                                                  cv2.THRESH_BINARY)
-        
-        # Convert to hex data for LED matrix
         reverse_bits = False  # Change to True if display is horizontally flipped
-        
-        print("\n--- Converting BINARY to hex ---")
-        hex_binary = convertToHex(saved_binary_original_8x8, reverse_bits)
-        print("\n--- Converting SOBEL to hex ---")
-        hex_sobel = convertToHex(saved_binary_sobel_8x8, reverse_bits)
-        print("\n--- Converting CANNY to hex ---")
-        hex_canny = convertToHex(saved_binary_canny_8x8, reverse_bits)
-        
-        # Display in format compatible with ledMatrix.py
-        print("\nHexadecimal representation for LED Matrix:")
-        print(f"binarypic = {hex_binary}")
-        print(f"sobelpic = {hex_sobel}")
-        print(f"cannypic = {hex_canny}")
-
-        # Save to file for easy copying to LED matrix code
-        with open("imageHexData.dat", "w") as f:
-            f.write(f"binarypic = {hex_binary}\n")
-            f.write(f"sobelpic = {hex_sobel}\n")
-            f.write(f"cannypic = {hex_canny}\n")
-        
-        print("\nData saved to imageHexData.dat")
-        print(f"Number of rows: {len(hex_sobel)}")
-        
-        # Wait for key press to close windows
-        print("\nPress any key in the image window to close...")
-        cv2.waitKey(0)
-        cv2.destroyAllWindows()
+        show_windows = True   # Change to False to skip the preview windows
+
+        # Previews are written on a background thread; the hex data below
+        # comes straight from the in-memory 8x8 results.
+        with BackgroundImageWriter() as writer:
+            frames, stages, binaries = imageToFrames(image, invert=invert_binary,
+                                                     reverse_bits=reverse_bits,
+                                                     preview_writer=writer, return_stages=True)
+
+            # Display in format compatible with ledMatrix.py
+            print("\nHexadecimal representation for LED Matrix:")
+            for var_name, hex_data in frames.items():
+                print(f"{var_name} = {hex_data}")
+
+            # Save to file for easy copying to LED matrix code
+            with open("imageHexData.dat", "w") as f:
+                for var_name, hex_data in frames.items():
+                    f.write(f"{var_name} = {hex_data}\n")
+
+            print("\nData saved to imageHexData.dat")
+            print(f"Number of rows: {len(frames['sobelpic'])}")
+
+        print(f"Preview images saved (all scaled up 30x for viewing): {writer.written}")
+        for path, error in writer.errors:
+            print(f"  Could not save {path}: {error}")
+
+        if show_windows:
+            for name, img in stages.items():
+                cv2.imshow(name, cv2.resize(img, (240, 240), interpolation=cv2.INTER_NEAREST))
+            for name, img in binaries.items():
+                cv2.imshow(name, cv2.resize(img * 255, (240, 240), interpolation=cv2.INTER_NEAREST))
+            print("\nPress any key in the image window to close...")
+            cv2.waitKey(0)
+            cv2.destroyAllWindows()
 
     except FileNotFoundError as e:
         print(e)
     except Exception as e:
-        print(f'Error: {e}')
\ No newline at end of file
+        print(f'Error: {e}')
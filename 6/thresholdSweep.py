@@ -0,0 +1,203 @@
+"""Threshold sweeps over cached Sobel/Canny gradients.
+
+processImage.py uses fixed thresholds (binary 127, Canny 100/200), and
+trying other values means rerunning the whole script. GradientCache
+computes an image's gradients once: the Sobel magnitude processImage.sobel()
+thresholds, and the Canny gradient with its non-maximum suppression. Whole
+grids of thresholds are then evaluated with vectorized comparisons.
+
+cannySweep() reproduces cv2.Canny(image, low, high) (aperture 3, L1
+gradient): the thinning step does not depend on the thresholds, so only
+the double threshold and the hysteresis (done for every setting at once)
+run per grid point.
+
+    python thresholdSweep.py lab6_8x8_gray.png
+"""
+
+import sys
+import time
+
+import cv2
+import numpy as np
+
+import hexPacking
+import processImage
+
+# tan(22.5 deg) in the fixed-point form cv2.Canny uses
+_CANNY_SHIFT = 15
+_TG22 = int(0.4142135623730950488016887242097 * (1 << _CANNY_SHIFT) + 0.5)
+
+
+class GradientCache:
+    """Gradients of one image, computed once and reused by every sweep."""
+
+    def __init__(self, image, size=(8, 8)):
+        """
+        Args:
+            image: Source image (grayscale or BGR)
+            size: Resize to this size first, like the LED pipeline
+                (None keeps the full resolution)
+        """
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if size is not None:
+            image = processImage.resizeImage(image, size)
+        self.image = image
+        self.sobel = processImage.sobel(image)
+
+        # Canny's own gradient: 3x3 Sobel, replicated border, L1 magnitude
+        dx = cv2.Sobel(image, cv2.CV_16S, 1, 0, ksize=3, borderType=cv2.BORDER_REPLICATE).astype(np.int64)
+        dy = cv2.Sobel(image, cv2.CV_16S, 0, 1, ksize=3, borderType=cv2.BORDER_REPLICATE).astype(np.int64)
+        self.cannyMagnitude = np.abs(dx) + np.abs(dy)
+        self.cannyPeaks = self._nonMaximumSuppression(dx, dy, self.cannyMagnitude)
+
+    @staticmethod
+    def _nonMaximumSuppression(dx, dy, mag):
+        """Mask of pixels that are local maxima along their gradient direction."""
+        h, w = mag.shape
+        padded = np.pad(mag, 1)  # cv2.Canny treats the outside as zero
+
+        def neighbour(oy, ox):
+            return padded[1 + oy:1 + oy + h, 1 + ox:1 + ox + w]
+
+        ax = np.abs(dx)
+        ay = np.abs(dy) << _CANNY_SHIFT
+        tg22x = ax * _TG22
+        tg67x = tg22x + (ax << (_CANNY_SHIFT + 1))
+        horizontal = ay < tg22x
+        vertical = ~horizontal & (ay > tg67x)
+        diagonal = ~horizontal & ~vertical
+        s = np.where((dx ^ dy) < 0, -1, 1)
+
+        peaks = np.zeros(mag.shape, dtype=bool)
+        peaks |= horizontal & (mag > neighbour(0, -1)) & (mag >= neighbour(0, 1))
+        peaks |= vertical & (mag > neighbour(-1, 0)) & (mag >= neighbour(1, 0))
+        # Diagonal neighbours depend on the gradient sign: (-1, -s) and (1, s)
+        for sign in (-1, 1):
+            peaks |= (diagonal & (s == sign) & (mag > neighbour(-1, -sign))
+                      & (mag > neighbour(1, sign)))
+        return peaks
+
+    def binarySweep(self, thresholds, source='sobel', invert=False):
+        """Binarize the cached Sobel magnitude (or the resized image) at every threshold.
+
+        Same result as processImage.convertToBinary() per threshold.
+
+        Returns:
+            (T, H, W) uint8 stack of 0/1 frames.
+        """
+        data = self.sobel if source == 'sobel' else self.image
+        thresholds = np.asarray(thresholds).reshape(-1, 1, 1)
+        frames = data[np.newaxis] > thresholds
+        if invert:
+            frames = ~frames
+        return frames.astype(np.uint8)
+
+    def cannySweep(self, lows, highs):
+        """Canny edges for every (low, high) pair of the two threshold lists.
+
+        Returns:
+            (frames, pairs): (L*H, height, width) uint8 stack of 0/1 frames
+            and the (L*H, 2) array of (low, high) used for each frame.
+        """
+        low, high = np.meshgrid(np.asarray(lows, dtype=float), np.asarray(highs, dtype=float),
+                                indexing='ij')
+        pairs = np.stack([low.ravel(), high.ravel()], axis=1)
+        # cv2.Canny swaps reversed thresholds and floors them for L1 gradients
+        lo = np.floor(pairs.min(axis=1)).reshape(-1, 1, 1)
+        hi = np.floor(pairs.max(axis=1)).reshape(-1, 1, 1)
+
+        mag = self.cannyMagnitude[np.newaxis]
+        weak = self.cannyPeaks[np.newaxis] & (mag > lo)
+        edges = weak & (mag > hi)
+        # Hysteresis for every setting at once: grow the strong edges into
+        # 8-connected weak pixels until nothing changes
+        while True:
+            padded = np.pad(edges, ((0, 0), (1, 1), (1, 1)))
+            h, w = edges.shape[1:]
+            grown = edges.copy()
+            for oy in (0, 1, 2):
+                for ox in (0, 1, 2):
+                    grown |= padded[:, oy:oy + h, ox:ox + w]
+            grown &= weak
+            if np.array_equal(grown, edges):
+                break
+            edges = grown
+        return edges.astype(np.uint8), pairs
+
+
+def frameMetrics(frames):
+    """Lit-pixel count and fraction of every frame in a stack."""
+    frames = np.asarray(frames)
+    on = frames.reshape(len(frames), -1).sum(axis=1)
+    return {'onPixels': on, 'onFraction': on / frames[0].size}
+
+
+def sweep(image, binaryThresholds=range(0, 256, 16), cannyLows=range(0, 256, 32),
+          cannyHighs=range(0, 256, 32), size=(8, 8)):
+    """Run the binary and Canny threshold grids on one image.
+
+    Returns a dict with, for 'sobel' and 'canny', the frame stack, the
+    thresholds used, pixel-count metrics and the packed LED row bytes.
+    """
+    cache = GradientCache(image, size)
+    sobelFrames = cache.binarySweep(binaryThresholds)
+    cannyFrames, pairs = cache.cannySweep(cannyLows, cannyHighs)
+    results = {}
+    for name, frames, settings in (('sobel', sobelFrames, np.asarray(binaryThresholds)),
+                                   ('canny', cannyFrames, pairs)):
+        results[name] = {
+            'frames': frames,
+            'thresholds': settings,
+            'metrics': frameMetrics(frames),
+            'packed': hexPacking.convertToHexBatch(frames) if frames.shape[-1] <= 8 else None,
+        }
+    return results
+
+
+def benchmark(path="lab6_8x8_gray.png", repeats=5):
+    """Compare the cached sweep against rerunning the pipeline per setting."""
+    binaryThresholds = list(range(0, 256, 8))
+    cannyLows = list(range(0, 256, 16))
+    cannyHighs = list(range(0, 256, 16))
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        # What trying a setting used to cost: load, resize, filter, threshold
+        for t in binaryThresholds:
+            image = cv2.cvtColor(processImage.loadImage(path), cv2.COLOR_BGR2GRAY)
+            processImage.convertToBinary(processImage.sobel(processImage.resizeImage(image)), t)
+        for lo in cannyLows:
+            for hi in cannyHighs:
+                image = cv2.cvtColor(processImage.loadImage(path), cv2.COLOR_BGR2GRAY)
+                reference = cv2.Canny(processImage.resizeImage(image), lo, hi)
+    perSetting = (time.perf_counter() - start) / repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        results = sweep(processImage.loadImage(path), binaryThresholds, cannyLows, cannyHighs)
+    cached = (time.perf_counter() - start) / repeats
+
+    # The last grid point must match cv2.Canny exactly
+    if not np.array_equal(results['canny']['frames'][-1], reference // 255):
+        raise AssertionError("cannySweep differs from cv2.Canny")
+
+    settings = len(binaryThresholds) + len(cannyLows) * len(cannyHighs)
+    print(f"Settings:           {settings}")
+    print(f"Rerun per setting:  {perSetting * 1000:.1f} ms")
+    print(f"Cached sweep:       {cached * 1000:.1f} ms")
+    print(f"Speedup:            {perSetting / cached:.0f}x")
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else "lab6_8x8_gray.png"
+    results = sweep(processImage.loadImage(path))
+    print("Sobel binarization:")
+    for t, on in zip(results['sobel']['thresholds'], results['sobel']['metrics']['onPixels']):
+        print(f"  threshold {t:3d}: {on:2d} LEDs on")
+    print("Canny (low/high):")
+    for (lo, hi), on in zip(results['canny']['thresholds'], results['canny']['metrics']['onPixels']):
+        if lo <= hi:
+            print(f"  {lo:3.0f}/{hi:3.0f}: {on:2d} LEDs on")
+    print()
+    benchmark(path)
@@ -0,0 +1,220 @@
+"""Streaming video -> 8x8 LED frame pipeline.
+
+VideoFrameStream reads a clip with cv2.VideoCapture on a worker thread,
+reduces the frames it keeps to 8x8 binary matrix frames with the
+processImage.py pipeline and pushes the row bytes into a bounded queue
+that the matrix refresh loop consumes.
+
+The worker keeps a playback clock at the target frame rate. Source frames
+that fall between display slots, or whose slot has already passed because
+the consumer fell behind, are skipped with cap.grab(), so they are never
+decoded. When the queue is full the worker blocks (backpressure) and then
+catches up by skipping, or, with drop_when_full=True (live sources), the
+oldest queued frame is discarded instead.
+
+Run this file directly to measure a clip without the matrix attached:
+    python videoFrames.py clip.mp4 --fps 15
+"""
+
+import argparse
+import queue
+import threading
+import time
+
+import cv2
+
+import hexPacking
+import processImage
+
+METHODS = ('binarypic', 'sobelpic', 'cannypic')
+_END = object()  # queued after the last frame
+
+
+class VideoFrameStream:
+    """Decode and reduce a video to LED frames on a background thread.
+
+    Iterate over the stream (or call get()) to receive one list of 8 row
+    bytes per displayed frame, in playback order.
+    """
+
+    def __init__(self, source, target_fps=10, queue_size=4, method='binarypic', invert=True,
+                 threshold=127, reverse_bits=False, drop_when_full=False):
+        """
+        Args:
+            source: Video file path (or camera index) for cv2.VideoCapture
+            target_fps: Display frame rate to hold
+            queue_size: Maximum number of reduced frames waiting for display
+            method: Which pipeline output to show ('binarypic', 'sobelpic', 'cannypic')
+            invert: Invert the binary of the original frame (dark pixels = LED on)
+            threshold: Binarization threshold
+            reverse_bits: If True, reverse the bit order in each row (MSB<->LSB)
+            drop_when_full: Discard the oldest queued frame instead of blocking
+                when the consumer falls behind
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown method: {method}")
+        self.source = source
+        self.target_fps = target_fps
+        self.method = method
+        self.invert = invert
+        self.threshold = threshold
+        self.reverse_bits = reverse_bits
+        self.drop_when_full = drop_when_full
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.source_fps = None
+        self.error = None
+        # Counters (see stats())
+        self.decoded = 0
+        self.skipped = 0
+        self.processed = 0
+        self.dropped = 0
+        self.delivered = 0
+        self._decode_time = 0.0
+        self._process_time = 0.0
+        self._start_time = None
+
+    def start(self):
+        """Open the video and start the worker thread."""
+        capture = cv2.VideoCapture(self.source)
+        if not capture.isOpened():
+            raise FileNotFoundError(f"Could not open video: {self.source}")
+        self.source_fps = capture.get(cv2.CAP_PROP_FPS) or self.target_fps
+        self._start_time = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, args=(capture,),
+                                        name="video-frames", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the worker thread and release the video."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, capture):
+        # Keep every step-th source frame; grab() the rest without decoding.
+        # next_keep also moves forward with wall time: the next kept frame is
+        # shown after the ones already queued, so any source frame whose
+        # display slot lies before that is skipped.
+        step = max(1.0, self.source_fps / self.target_fps)
+        next_keep = 0.0
+        index = 0
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                slot = int((start - self._start_time) * self.target_fps) + self._queue.qsize()
+                next_keep = max(next_keep, slot * step)
+                if index < next_keep:
+                    ok = capture.grab()
+                    if ok:
+                        self.skipped += 1
+                    index += 1
+                    if not ok:
+                        break
+                    continue
+                ok, frame = capture.read()
+                self._decode_time += time.perf_counter() - start
+                if not ok:
+                    break
+                self.decoded += 1
+                index += 1
+                next_keep += step
+
+                start = time.perf_counter()
+                _, binaries = processImage.processToBinary(frame, invert=self.invert,
+                                                           threshold=self.threshold)
+                rows = hexPacking.convertToHexBatch(binaries[self.method], self.reverse_bits).tolist()
+                self._process_time += time.perf_counter() - start
+                self.processed += 1
+                self._put(rows)
+        except Exception as e:
+            self.error = e
+        finally:
+            capture.release()
+            self._put(_END, force=True)
+
+    def _put(self, item, force=False):
+        while not self._stop.is_set() or force:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if self.drop_when_full or force:
+                    try:
+                        self._queue.get_nowait()
+                        with self._lock:
+                            self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout=None):
+        """Return the next frame's 8 row bytes, or None at the end of the clip."""
+        item = self._queue.get(timeout=timeout)
+        if item is _END:
+            # Leave the marker in place so later get() calls also see the end
+            self._queue.put(_END)
+            return None
+        self.delivered += 1
+        return item
+
+    def __iter__(self):
+        while True:
+            rows = self.get()
+            if rows is None:
+                return
+            yield rows
+
+    def stats(self):
+        """Frame counts and rates so far.
+
+        decode_fps and process_fps are throughputs of those stages (frames
+        per second of time spent in them); delivered_fps is frames handed to
+        the consumer per second of wall time.
+        """
+        elapsed = time.perf_counter() - self._start_time if self._start_time else 0.0
+        return {
+            'source_fps': self.source_fps,
+            'target_fps': self.target_fps,
+            'decoded': self.decoded,
+            'skipped': self.skipped,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'delivered': self.delivered,
+            'decode_fps': self.decoded / self._decode_time if self._decode_time else 0.0,
+            'process_fps': self.processed / self._process_time if self._process_time else 0.0,
+            'delivered_fps': self.delivered / elapsed if elapsed else 0.0,
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def printStats(stats):
+    print(f"Source fps:    {stats['source_fps']:.1f} (target {stats['target_fps']})")
+    print(f"Decoded:       {stats['decoded']} frames at {stats['decode_fps']:.1f} fps "
+          f"({stats['skipped']} skipped without decoding)")
+    print(f"Processed:     {stats['processed']} frames at {stats['process_fps']:.1f} fps")
+    print(f"Delivered:     {stats['delivered']} frames at {stats['delivered_fps']:.1f} fps "
+          f"({stats['dropped']} dropped)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Stream a video through the 8x8 LED pipeline without the matrix.")
+    parser.add_argument("video", help="video file to read")
+    parser.add_argument("--fps", type=float, default=10, help="target display frame rate")
+    parser.add_argument("--method", default="binarypic", choices=METHODS)
+    args = parser.parse_args()
+
+    # Stand-in for the matrix refresh loop: show each frame for 1/fps seconds
+    with VideoFrameStream(args.video, target_fps=args.fps, method=args.method) as stream:
+        for rows in stream:
+            time.sleep(1.0 / args.fps)
+        printStats(stream.stats())
+        if stream.error:
+            print(f"Error: {stream.error}")
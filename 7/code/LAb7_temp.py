@@ -9,15 +9,29 @@ Instructions:
 4. Save all your output images using cv2.imwrite().
 """
 
+import sys
+from pathlib import Path
+
 import cv2
 import numpy as np
 import matplotlib.pyplot as plt
 
+# Repository root, so the shared helpers in common/ can be imported
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.feature_cache import FeatureCache
+from common.image_loader import imread
+
+# Keypoints/descriptors are cached on disk by image content + detector
+# settings, so warm runs skip extraction entirely
+feature_cache = FeatureCache()
+
 # --- Step 1: Read the image ---
-img = cv2.imread('space.jpg', cv2.IMREAD_GRAYSCALE)
+# The cached loader decodes space.jpg once: the grayscale version is
+# converted from the cached color decode instead of decoding the file again
+img = imread('space.jpg', cv2.IMREAD_GRAYSCALE)
 
 # TODO: Try IMREAD_COLOR instead.
-img_color = cv2.imread('space.jpg', cv2.IMREAD_COLOR)
+img_color = imread('space.jpg', cv2.IMREAD_COLOR)
 # Then print img.shape for both cases and describe what changes.
 print("Grayscale image shape:", img.shape)
 print("Color image shape:", img_color.shape)
@@ -29,11 +43,13 @@ the Color image has three dimensions (height, width, 3(we can hypothesize number
 
 # --- Step 2: Create SIFT detector ---
 # TODO: Find how to create a SIFT detector object in the docs.
-sift = cv2.SIFT_create()
+# (The cache creates it with cv2.SIFT_create(**sift_params) on a miss.)
+sift_params = {}
 
 # --- Step 3: Detect keypoints and descriptors ---
 # TODO: Look up how to detect and compute both at once.
-keypoints_sift, descriptors_sift = sift.detectAndCompute(img, None)
+kp_sift, descriptors_sift, _ = feature_cache.detect_and_compute(img, "SIFT", sift_params)
+keypoints_sift = kp_sift.to_cv()
 
 # --- Step 4: Print some info ---
 print("Number of keypoints (SIFT):", len(keypoints_sift))
@@ -56,10 +72,11 @@ cv2.imwrite('sift_keypoints.jpg', img_sift)
 # TODO: Find ORB_create and its parameters (e.g., nfeatures).
 # Hint: A common starting value is around 500, but try different values (like 100, 1000)
 # and describe how changing this number affects the number of detected keypoints.
-orb = cv2.ORB_create(nfeatures=500)
+orb_params = {"nfeatures": 500}
 
 # --- Step 7: Detect and compute with ORB ---
-keypoints_orb, descriptors_orb = orb.detectAndCompute(img, None)
+kp_orb, descriptors_orb, _ = feature_cache.detect_and_compute(img, "ORB", orb_params)
+keypoints_orb = kp_orb.to_cv()
 
 print("Number of keypoints (ORB):", len(keypoints_orb))
 print("Descriptor shape (ORB):", descriptors_orb.shape)
@@ -77,23 +94,21 @@ cv2.imwrite('orb_keypoints.jpg', img_orb)
 # "response" measures how strong or distinctive a detected feature is — higher = stronger feature.
 # Then select the top 50 keypoints for both SIFT and ORB and visualize them.
 # Save the resulting images as 'sift_top50.jpg' and 'orb_top50.jpg'.
-def getResponse(kp):
-    return kp.response
-
-sorted_sift = sorted(keypoints_sift, key=getResponse, reverse=True)
-sorted_orb = sorted(keypoints_orb, key=getResponse, reverse=True)
-
-sorted_sift = sorted_sift[:50]
-sorted_orb = sorted_orb[:50]
+# The keypoints are kept as columnar arrays (kp_sift / kp_orb); picking the
+# top 50 is then an O(n) np.argpartition on the response column instead of a
+# full sorted() over KeyPoint objects.
+top_sift = kp_sift.top_k(50)
+top_orb = kp_orb.top_k(50)
 
-#for i, (kps, kpo) in enumerate(zip(sorted_sift, sorted_orb)):
-#    print(i, kps.response, kpo.response)
+#for i, (r_sift, r_orb) in enumerate(zip(top_sift.response, top_orb.response)):
+#    print(i, r_sift, r_orb)
 
 
-print("Top 50 SIFT keypoints responses:", len(sorted_sift))
+print("Top 50 SIFT keypoints responses:", len(top_sift))
 
-cv2.imwrite("sift_top50.jpg", cv2.drawKeypoints(img, sorted_sift, None, (255, 0, 255)))
-cv2.imwrite("orb_top50.jpg", cv2.drawKeypoints(img, sorted_orb, None, (255, 0, 255)))
+# KeyPoint objects are only rebuilt for drawing
+cv2.imwrite("sift_top50.jpg", cv2.drawKeypoints(img, top_sift.to_cv(), None, (255, 0, 255)))
+cv2.imwrite("orb_top50.jpg", cv2.drawKeypoints(img, top_orb.to_cv(), None, (255, 0, 255)))
 
 # --- Step 10: Print and explain descriptors ---
 # Print the first few descriptor values for each method.
@@ -0,0 +1,179 @@
+"""Feature-extraction benchmark suite built on Lab8_temp.time_extraction_runs.
+
+Sweeps detector x image x scale x cv2.setNumThreads x nfeatures, times each
+configuration over several repeats (p50/p95 reported), records peak memory
+and writes everything to JSON together with the OpenCV build it ran on.
+Passing --baseline compares p50 times against an earlier results file and
+exits with status 1 if any configuration got slower than the tolerance.
+
+Each configuration runs in a fresh process by default, so its peak memory
+is its own and not the maximum of everything that ran before it.
+
+Examples:
+    python benchmark_extraction.py --repeats 20 -o results.json
+    python benchmark_extraction.py --threads 1 4 --scales 1 0.5 --baseline results.json
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+import Lab8_temp
+
+try:
+    import resource
+except ImportError:  # Windows: peak memory is not reported
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def config_key(config):
+    return "{detector}|{image}|scale={scale}|threads={threads}|nfeatures={nfeatures}".format(**config)
+
+
+def run_config(config, repeats, warmup):
+    """Time one configuration; returns the config merged with its statistics."""
+    cv2.setNumThreads(config["threads"])
+    image = Lab8_temp.load_images()[config["image"]]
+    if config["scale"] != 1:
+        image = cv2.resize(image, None, fx=config["scale"], fy=config["scale"],
+                           interpolation=cv2.INTER_AREA)
+    params = {"nfeatures": config["nfeatures"]} if config["nfeatures"] is not None else {}
+    detector = Lab8_temp.feature_cache.create_detector(config["detector"], params)
+
+    rss_before = peak_rss_mb()
+    keypoints, descriptors, durations = Lab8_temp.time_extraction_runs(
+        detector, image, repeats=repeats, warmup=warmup
+    )
+    rss_after = peak_rss_mb()
+
+    durations_ms = np.array(durations) * 1000
+    return dict(
+        config,
+        key=config_key(config),
+        image_shape=list(image.shape),
+        keypoints=len(keypoints),
+        repeats=repeats,
+        p50_ms=float(np.percentile(durations_ms, 50)),
+        p95_ms=float(np.percentile(durations_ms, 95)),
+        mean_ms=float(durations_ms.mean()),
+        min_ms=float(durations_ms.min()),
+        peak_rss_mb=rss_after,
+        extraction_rss_mb=None if rss_before is None else rss_after - rss_before,
+    )
+
+
+def environment():
+    """Machine and OpenCV build the results were recorded on."""
+    return {
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "opencv_default_threads": cv2.getNumThreads(),
+        "opencv_optimized": cv2.useOptimized(),
+    }
+
+
+def run_suite(configs, repeats, warmup, isolate=True):
+    results = []
+    for config in configs:
+        if isolate:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(run_config, config, repeats, warmup).result()
+        else:
+            result = run_config(config, repeats, warmup)
+        results.append(result)
+        memory = "" if result["peak_rss_mb"] is None else f" | peak {result['peak_rss_mb']:7.1f} MB"
+        print(f"{result['key']:<48} | kps {result['keypoints']:6d} | "
+              f"p50 {result['p50_ms']:8.2f} ms | p95 {result['p95_ms']:8.2f} ms{memory}")
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Print p50 changes against a baseline file; return the regressed keys."""
+    previous = {r["key"]: r for r in baseline["results"]}
+    regressions = []
+    print(f"\nBaseline: OpenCV {baseline['environment']['opencv']} on "
+          f"{baseline['environment']['platform']}")
+    for result in results:
+        old = previous.get(result["key"])
+        if old is None:
+            print(f"{result['key']:<48} | no baseline")
+            continue
+        change = result["p50_ms"] / old["p50_ms"] - 1
+        flag = ""
+        if change > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(result["key"])
+        print(f"{result['key']:<48} | p50 {old['p50_ms']:8.2f} -> {result['p50_ms']:8.2f} ms "
+              f"({change:+.1%}){flag}")
+    return regressions
+
+
+def parse_nfeatures(value):
+    return None if value.lower() == "default" else int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SIFT/ORB feature extraction.")
+    parser.add_argument("--detectors", nargs="+", default=["SIFT", "ORB"])
+    parser.add_argument("--images", nargs="+", default=list(Lab8_temp.IMAGE_NAMES))
+    parser.add_argument("--scales", nargs="+", type=float, default=[1.0])
+    parser.add_argument("--threads", nargs="+", type=int, default=[cv2.getNumThreads()],
+                        help="values for cv2.setNumThreads (default: OpenCV's current setting)")
+    parser.add_argument("--nfeatures", nargs="+", type=parse_nfeatures, default=[None],
+                        help="nfeatures values, or 'default' for the detector default")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--no-isolate", action="store_true",
+                        help="run every configuration in this process (peak memory is then cumulative)")
+    parser.add_argument("-o", "--output", default="extraction_benchmark.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed p50 slowdown before flagging a regression (default 0.10 = 10%%)")
+    args = parser.parse_args()
+    if args.repeats < 1:
+        parser.error("--repeats must be at least 1")
+
+    configs = [
+        dict(detector=d, image=i, scale=s, threads=t, nfeatures=n)
+        for d, i, s, t, n in itertools.product(args.detectors, args.images, args.scales,
+                                                args.threads, args.nfeatures)
+    ]
+    results = run_suite(configs, args.repeats, args.warmup, isolate=not args.no_isolate)
+
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
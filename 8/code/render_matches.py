@@ -0,0 +1,95 @@
+"""Regenerate the match visualisations in output/SIFT and output/ORB.
+
+Each detector's descriptors are matched once per matcher with
+common.matching.MatchSets (a k=2 kNN pass in each direction), and every
+filtered set is drawn from that one result:
+
+    output/<DETECTOR>/raw_bf.jpg, bf_distance.jpg, bf_ratio.jpg, bf_symmetry.jpg
+    output/<DETECTOR>/raw_flann.jpg, flann_distance.jpg, flann_ratio.jpg
+
+With --compare, the time of matching separately per strategy (match,
+knnMatch, crossCheck BFMatcher) is printed next to the single pass.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+
+# Repository root, so the shared helpers in common/ can be imported
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+import Lab8_temp
+from common.extraction import ExtractionJob, FeatureExtractor
+from common.feature_cache import FeatureCache
+from common.matching import MatchSets, create_matcher, prepare_descriptors
+
+OUTPUT_DIR = Path(__file__).resolve().parent / "output"
+
+# Output file name per (matcher, strategy)
+OUTPUT_NAMES = {
+    ("BF", "raw"): "raw_bf",
+    ("BF", "distance"): "bf_distance",
+    ("BF", "ratio"): "bf_ratio",
+    ("BF", "symmetry"): "bf_symmetry",
+    ("FLANN", "raw"): "raw_flann",
+    ("FLANN", "distance"): "flann_distance",
+    ("FLANN", "ratio"): "flann_ratio",
+}
+
+
+def separate_passes(query, train, detector_name, method):
+    """What the strategies cost when each one runs its own matching call."""
+    query = prepare_descriptors(query, detector_name)
+    train = prepare_descriptors(train, detector_name)
+    start = time.perf_counter()
+    matcher = create_matcher(method, detector_name)
+    matcher.match(query, train)                  # raw
+    matcher.match(query, train)                  # distance (filtered afterwards)
+    matcher.knnMatch(query, train, k=2)          # ratio
+    if method == "BF":
+        create_matcher("BF", detector_name, cross_check=True).match(query, train)  # symmetry
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Draw Lab 8 match sets from one matching pass.")
+    parser.add_argument("--compare", action="store_true",
+                        help="also time one matching call per strategy")
+    args = parser.parse_args()
+
+    images = Lab8_temp.load_images()
+    pre, post = images["pre"], images["post"]
+    extractor = FeatureExtractor(cache=FeatureCache())
+
+    for detector_name in Lab8_temp.DETECTORS:
+        (kp_pre, desc_pre, _, _), (kp_post, desc_post, _, _) = extractor.run(
+            [ExtractionJob(pre, detector_name), ExtractionJob(post, detector_name)]
+        )
+        kp_pre, kp_post = kp_pre.to_cv(), kp_post.to_cv()
+        folder = OUTPUT_DIR / detector_name
+        folder.mkdir(parents=True, exist_ok=True)
+        print(f"=== {detector_name} ===")
+
+        for method in ("BF", "FLANN"):
+            start = time.perf_counter()
+            sets = MatchSets(desc_pre, desc_post, detector_name, method)
+            elapsed = time.perf_counter() - start
+            counts = ", ".join(f"{name} {count}" for name, count in sets.counts().items())
+            print(f"{method:5s} single pass: {elapsed:.3f} s | {counts}")
+            if args.compare:
+                print(f"{method:5s} one call per strategy: "
+                      f"{separate_passes(desc_pre, desc_post, detector_name, method):.3f} s")
+
+            for strategy in MatchSets.STRATEGIES:
+                name = OUTPUT_NAMES.get((method, strategy))
+                if name is None:
+                    continue
+                drawn = cv2.drawMatches(pre, kp_pre, post, kp_post, sets.matches(strategy), None)
+                cv2.imwrite(str(folder / f"{name}.jpg"), drawn)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compare robust homography estimators on the Lab 9 matches.
+
+Every estimator in common.homography.ESTIMATORS runs on the same SIFT and
+ORB matches (Lowe ratio-filtered by default, --set raw for the
+unfiltered best matches); the table shows time, inlier ratio and
+mean inlier reprojection error, followed by the fastest estimator whose
+error is within --max-error pixels and that keeps at least
+--relative-inliers times the inliers of the best estimator (and, optionally,
+--min-inliers of the matches).
+
+    python benchmark_homography.py --confidence 0.999 --max-iters 5000
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Repository root, so the shared helpers in common/ can be imported
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+import lab9
+from common.extraction import ExtractionJob
+from common.homography import compare_estimators, describe, fastest_accurate
+from common.matching import MatchSets, gather_points, keypoint_coords
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark homography estimators.")
+    parser.add_argument("--detectors", nargs="+", default=["SIFT", "ORB"])
+    parser.add_argument("--matcher", default="BF", help="BF or FLANN")
+    parser.add_argument("--set", default="ratio", choices=MatchSets.STRATEGIES,
+                        help="which match set to estimate from")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    parser.add_argument("--confidence", type=float, default=0.995)
+    parser.add_argument("--max-iters", type=int, default=2000)
+    parser.add_argument("--max-error", type=float, default=3.0,
+                        help="accuracy requirement: mean inlier reprojection error in pixels")
+    parser.add_argument("--min-inliers", type=float, default=0.0,
+                        help="accuracy requirement: minimum inlier ratio")
+    parser.add_argument("--relative-inliers", type=float, default=0.75,
+                        help="accuracy requirement: minimum inliers as a fraction of the "
+                             "best estimator's (default 0.75)")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    images = [lab9.loadImage(p) for p in ["img1.jpg", "img2.jpg"]]
+    for detectorName in args.detectors:
+        # Features only (lab9's cached extractor): MatchSets does the matching
+        results = lab9.extractor.run([ExtractionJob(image, detectorName) for image in images])
+        kps = [r.keypoints for r in results]
+        descs = [r.descriptors for r in results]
+        matches = MatchSets(descs[0], descs[1], detectorName, args.matcher).indices(args.set)
+        src, dst = gather_points(keypoint_coords(kps[0]), keypoint_coords(kps[1]), matches)
+        print(f"=== {detectorName}: {len(matches)} matches ===")
+        results = compare_estimators(src, dst, repeats=args.repeats, threshold=args.threshold,
+                                     confidence=args.confidence, max_iters=args.max_iters)
+        for result in sorted(results, key=lambda r: r.seconds):
+            print("  " + describe(result))
+        best = fastest_accurate(results, args.max_error, args.min_inliers, args.relative_inliers)
+        print(f"Fastest within {args.max_error} px: {best.method if best else 'none'}\n")
+
+
+if __name__ == "__main__":
+    main()
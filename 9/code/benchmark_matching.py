@@ -0,0 +1,120 @@
+"""Brute-force vs FLANN matching on the Lab 9 image pair.
+
+For SIFT (KD-tree index) and ORB (LSH index) this times:
+  - brute-force matching (exact nearest neighbours, the recall reference)
+  - FLANN index construction, once
+  - FLANN queries at several `checks` values, reusing the trained index
+
+Recall is the fraction of query descriptors for which FLANN found a true
+nearest neighbour (a match as close as brute force's; Hamming distances
+tie often, so comparing indices would undercount). The last column is what matching the
+pair `repeats` times costs when the index is rebuilt every time vs reused.
+
+It also compares per-DMatch list comprehensions with MatchArrays for
+gathering homography points and distance filtering, on 200k synthetic
+matches.
+
+    python benchmark_matching.py [img1.jpg img2.jpg]
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Repository root, so the shared helpers in common/ can be imported
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.feature_cache import FeatureCache
+from common.matching import MatchArrays, MatchIndex, gather_points, keypoint_coords
+from common.timing import timed
+
+CHECKS = (8, 16, 32, 64, 128)
+
+
+def bestDistance(matches, size):
+    """Distance of each query's best match (inf where there is none)."""
+    best = np.full(size, np.inf)
+    for m in matches:
+        best[m.queryIdx] = m.distance
+    return best
+
+
+def benchmarkDetector(images, detectorName, checks=CHECKS, repeats=10):
+    cache = FeatureCache()
+    (_, query, _), (_, train, _) = (cache.detect_and_compute(i, detectorName) for i in images)
+    query, train = np.asarray(query), np.asarray(train)
+    print(f"=== {detectorName}: {len(query)} x {len(train)} descriptors ===")
+
+    bfTime, bfMatches = timed(lambda: MatchIndex(train, detectorName, "BF").match(query))
+    reference = bestDistance(bfMatches, len(query))
+    print(f"BF match:          {bfTime * 1000:8.1f} ms")
+
+    buildTime, _ = timed(lambda: MatchIndex(train, detectorName, "FLANN"))
+    print(f"FLANN index build: {buildTime * 1000:8.1f} ms")
+
+    print(f"{'checks':>8} | {'query ms':>9} | {'recall':>7} | {'speedup':>7} | "
+          f"{repeats}x rebuild vs reuse (ms)")
+    for c in checks:
+        # checks is fixed when a FlannBasedMatcher is created: one index per value
+        flann = MatchIndex(train, detectorName, "FLANN", checks=c)
+        queryTime, matches = timed(lambda: flann.match(query))
+        recall = np.mean(bestDistance(matches, len(query)) <= reference * (1 + 1e-6))
+        rebuild = repeats * (buildTime + queryTime)
+        reuse = buildTime + repeats * queryTime
+        print(f"{c:8d} | {queryTime * 1000:9.1f} | {recall:7.1%} | {bfTime / queryTime:6.1f}x | "
+              f"{rebuild * 1000:8.1f} vs {reuse * 1000:8.1f}")
+    print()
+
+
+def benchmarkPointGathering(numMatches=200_000, numKeypoints=20_000, distanceThresh=50, seed=0):
+    """Per-DMatch comprehensions vs one conversion to arrays plus fancy indexing."""
+    rng = np.random.default_rng(seed)
+    kps = [[cv2.KeyPoint(float(x), float(y), 1.0) for x, y in rng.uniform(0, 1600, (numKeypoints, 2))]
+           for _ in range(2)]
+    matches = [cv2.DMatch(int(q), int(t), float(d)) for q, t, d in
+               zip(rng.integers(0, numKeypoints, numMatches), rng.integers(0, numKeypoints, numMatches),
+                   rng.uniform(0, 100, numMatches))]
+    print(f"=== Point gathering: {numMatches} matches ===")
+
+    def legacy():
+        src = np.float32([kps[0][m.queryIdx].pt for m in matches]).reshape(-1, 1, 2)
+        dst = np.float32([kps[1][m.trainIdx].pt for m in matches]).reshape(-1, 1, 2)
+        filtered = [m for m in matches if m.distance < distanceThresh]
+        return src, dst, len(filtered)
+
+    def vectorized():
+        arrays = MatchArrays.from_dmatches(matches)
+        src, dst = gather_points(keypoint_coords(kps[0]), keypoint_coords(kps[1]), arrays)
+        filtered = arrays[arrays.distance < distanceThresh]
+        return src, dst, len(filtered)
+
+    legacyTime, expected = timed(legacy)
+    vectorTime, result = timed(vectorized)
+    if not (np.array_equal(expected[0], result[0]) and np.array_equal(expected[1], result[1])
+            and expected[2] == result[2]):
+        raise AssertionError("vectorized point gathering differs from the comprehensions")
+    print(f"Comprehensions:    {legacyTime * 1000:8.1f} ms")
+    print(f"MatchArrays:       {vectorTime * 1000:8.1f} ms")
+    print(f"Speedup:           {legacyTime / vectorTime:8.1f}x")
+
+    # Once matches are arrays (e.g. from MatchSets), only the indexing remains
+    arrays = MatchArrays.from_dmatches(matches)
+    coords = [keypoint_coords(k) for k in kps]
+    indexTime, _ = timed(lambda: (gather_points(coords[0], coords[1], arrays),
+                                  arrays[arrays.distance < distanceThresh]))
+    print(f"Indexing only:     {indexTime * 1000:8.1f} ms")
+    print()
+
+
+def main():
+    paths = sys.argv[1:3] if len(sys.argv) > 2 else ["img1.jpg", "img2.jpg"]
+    base = Path(__file__).resolve().parent
+    images = [cv2.imread(str(base / p), cv2.IMREAD_GRAYSCALE) for p in paths]
+    for detectorName in ("SIFT", "ORB"):
+        benchmarkDetector(images, detectorName)
+    benchmarkPointGathering()
+
+
+if __name__ == "__main__":
+    main()
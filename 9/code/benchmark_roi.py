@@ -0,0 +1,46 @@
+"""Masked ROI detection vs full-image detection for pipelineB's location filter.
+
+Full: detectAndCompute on the whole image, then drop keypoints outside the
+cutoff box (filter_in_box). Masked: the box is passed to detectAndCompute
+as a mask, so the borders are never described. The feature cache is not
+used, so both sides really extract.
+
+    python benchmark_roi.py [SIFT|ORB ...]
+"""
+
+import sys
+from pathlib import Path
+
+# Repository root, so the shared helpers in common/ can be imported
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+import lab9
+from common.extraction import ExtractionJob, box_mask, extract
+from common.keypoints import filter_in_box
+from common.timing import timed
+
+
+def benchmarkRoi(images, detectorName):
+    print(f"=== {detectorName} ===")
+    for n, (image, box) in enumerate(zip(images, lab9.locationBoxes(images)), start=1):
+        def full():
+            keypoints, descriptors, _ = extract(ExtractionJob(image, detectorName))
+            return filter_in_box(keypoints, descriptors, *box)
+
+        mask = box_mask(image.shape, *box)
+        fullTime, (fullKps, _) = timed(full)
+        maskTime, (maskKps, _, _) = timed(lambda: extract(ExtractionJob(image, detectorName, None, mask)))
+        print(f"Image {n}: full + filter {fullTime * 1000:7.1f} ms ({len(fullKps)} kps) | "
+              f"masked {maskTime * 1000:7.1f} ms ({len(maskKps)} kps) | "
+              f"{fullTime / maskTime:.2f}x")
+    print()
+
+
+def main():
+    detectors = sys.argv[1:] or ["SIFT", "ORB"]
+    images = [lab9.loadImage(p) for p in ["img1.jpg", "img2.jpg"]]
+    for detectorName in detectors:
+        benchmarkRoi(images, detectorName)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,153 +1,170 @@
+import sys
+from pathlib import Path
+
 import cv2
-import numpy as np
+
+# Repository root, so the shared helpers in common/ can be imported
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.extraction import ExtractionJob, FeatureExtractor, box_mask
+from common.feature_cache import FeatureCache
+from common.homography import describe, estimate_homography
+from common.image_loader import imread
+from common.image_writer import BackgroundImageWriter
+from common.keypoints import filter_in_box
+from common.match_drawing import MatchDrawing
+from common.matching import MatchArrays, MatchIndex, gather_points, keypoint_coords
+
+# Keypoints/descriptors are cached on disk by image content + detector, so
+# warm runs skip detectAndCompute entirely; misses are extracted concurrently
+featureCache = FeatureCache()
+extractor = FeatureExtractor(cache=featureCache)
+
+# Which match drawings main() renders: the full-resolution combined drawing
+# (inliers green, outliers red), a downscaled preview (None to skip), and
+# separate inlier/outlier images (off: each is another full-resolution render;
+# set True for the A2Inliers/A2Outliers and BInliers/BOutliers files)
+SAVE_FULL_RESOLUTION = True
+SAVE_SEPARATE = False
+PREVIEW_WIDTH = 1600
 
 
 def loadImage(path):
-    loadedImage = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+    # Decoded once, then memory-mapped from the image cache on later runs
+    loadedImage = imread(path, cv2.IMREAD_GRAYSCALE)
     return loadedImage
 
-def prePipeline(images, type):
-    if str(type).casefold() == "orb":
-        detector = cv2.ORB_create()
-        matcherType = cv2.NORM_HAMMING
-    else:
-        detector = cv2.SIFT_create()
-        matcherType = cv2.NORM_L2
-
-    kps, descs = [], []
-    for i in images:
-        kpi, desci = detector.detectAndCompute(i, None)
-        kps.append(kpi)
-        descs.append(desci)
-    
-    bf = cv2.BFMatcher(matcherType)
-    matches_bf = bf.match(descs[0], descs[1])
+def prePipeline(images, type, matcher="BF", checks=50):
+    """Detect features in both images and match image 0 against image 1.
+
+    matcher is "BF" (brute force) or "FLANN" (KD-tree index for SIFT, LSH for
+    ORB, searched with `checks` effort). Also returns the MatchIndex trained
+    on image 1, so further images can be matched against it without
+    rebuilding the index.
+    """
+    detectorName = "ORB" if str(type).casefold() == "orb" else "SIFT"
+
+    results = extractor.run([ExtractionJob(i, detectorName) for i in images])
+    kps = [r.keypoints.to_cv() for r in results]
+    descs = [r.descriptors for r in results]
 
-    return matches_bf, kps, descs
+    index = MatchIndex(descs[1], detectorName, matcher, checks)
+    matches = index.match(descs[0])
+
+    return matches, kps, descs, index
 
 def pipelineA1(images, kps, matches, distance_thresh= 50):
-    filteredMatches = [m for m in matches if m.distance < distance_thresh]
+    # One conversion to arrays, then the distance filter is a single mask
+    matchArrays = MatchArrays.from_dmatches(matches)
+    filteredMatches = matchArrays[matchArrays.distance < distance_thresh].to_dmatches()
     
     match_img = cv2.drawMatches(images[0], kps[0], images[1], kps[1], filteredMatches, None, flags=cv2.DrawMatchesFlags_NOT_DRAW_SINGLE_POINTS)
 
     return match_img
 
-def pipelineA2(images, kps, matches):
+def pipelineA2(images, kps, matches, estimator="RANSAC", threshold=10.0, confidence=0.995, maxIters=2000):
+    """Homography from the matches plus an inlier/outlier drawing.
+
+    estimator selects the robust estimator (see common.homography.ESTIMATORS);
+    its time, inlier ratio and reprojection error are printed. The drawing
+    is a MatchDrawing: nothing is rendered until render()/preview() is
+    called, and inliers (green) and outliers (red) are drawn in one pass.
+    """
     if len(matches) < 4:
         print("Not enough matches to compute homography.")
-        return None, None, None
-
-    src_pts = np.float32([kps[0][m.queryIdx].pt for m in matches]).reshape(-1, 1, 2)
-    dst_pts = np.float32([kps[1][m.trainIdx].pt for m in matches]).reshape(-1, 1, 2)
+        return None, None
 
-    # Compute Homography using RANSAC
-    H_A, mask = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 10.0)
-    matchesMask = mask.ravel().tolist()
+    src_pts, dst_pts = gather_points(keypoint_coords(kps[0]), keypoint_coords(kps[1]), matches)
 
-    # Draw inliers
-    draw_params_inliers = dict(matchColor=(0, 255, 0), # Green for inliers
-                               singlePointColor=None,
-                               matchesMask=matchesMask,
-                               flags=cv2.DrawMatchesFlags_NOT_DRAW_SINGLE_POINTS)
-    img_inliers = cv2.drawMatches(images[0], kps[0], images[1], kps[1], matches, None, **draw_params_inliers) # Here, the **draw_params_inliers unpacks the dictionary into keyword arguments
+    # Compute Homography with the chosen robust estimator
+    estimate = estimate_homography(src_pts, dst_pts, estimator, threshold, confidence, maxIters)
+    print(describe(estimate))
+    if estimate.H is None:
+        return None, None
 
-    # Draw outliers
-    outliersMask = [1 - m for m in matchesMask]
-    draw_params_outliers = dict(matchColor=(0, 0, 255), # Red for outliers
-                                singlePointColor=None,
-                                matchesMask=outliersMask,
-                                flags=cv2.DrawMatchesFlags_NOT_DRAW_SINGLE_POINTS)
-    img_outliers = cv2.drawMatches(images[0], kps[0], images[1], kps[1], matches, None, **draw_params_outliers)
+    drawing = MatchDrawing(images[0], src_pts, images[1], dst_pts, estimate.inliers)
+    return estimate.H, drawing
 
-    return H_A, img_inliers, img_outliers
-
-def pipelineB(images, type):
+def locationBoxes(images):
+    """Hand-tuned (x_min, x_max, y_min, y_max) per image that isolate the cathedral."""
+    boundaries = images[0].shape[1]
+    return [
+        # Image 1
+        (65, boundaries - 50, 5, images[0].shape[0] - 10),
+        # Image 2
+        (50, boundaries - 55, 0, images[1].shape[0] - 20),
+    ]
+
+def pipelineB(images, type, matcher="BF", useMask=True, **estimatorOptions):
     """
     Pipeline B: With Location Filter
     Similar to A but adds a location filter for keypoints to isolate the cathedral.
+
+    With useMask the cutoff boxes are passed to detectAndCompute as masks, so
+    the excluded borders are never described. Otherwise features are
+    detected on the whole image and filtered afterwards (descriptor rows
+    kept in sync with their keypoints).
     """
-    # 1. Detect Keypoints and Descriptors (ORB or SIFT)
-    #    You can use the code from prePipeline() here or call it, 
-    #    but you need access to the raw keypoints and descriptors BEFORE matching.
-    if str(type).casefold() == "orb":
-        detector = cv2.ORB_create()
-        matcherType = cv2.NORM_HAMMING
+    detectorName = "ORB" if str(type).casefold() == "orb" else "SIFT"
+    boxes = locationBoxes(images)
+
+    # 1-3. Detect keypoints and descriptors inside the cutoff boxes
+    if useMask:
+        jobs = [ExtractionJob(i, detectorName, None, box_mask(i.shape, *box))
+                for i, box in zip(images, boxes)]
+        filtered = [(r.keypoints, r.descriptors) for r in extractor.run(jobs)]
     else:
-        detector = cv2.SIFT_create()
-        matcherType = cv2.NORM_L2
-
-    kps, descs = [], []
-    for i in images:
-        kpi, desci = detector.detectAndCompute(i, None)
-        kps.append(kpi)
-        descs.append(desci)
-
-
-    # 2. Define Cutoff Values
-    #    Determine the x-coordinates to crop the left and right sides.
-    #    img1_x_min, img1_x_max = ... (e.g., 100, width - 100)
-    #    img2_x_min, img2_x_max = ...
-    boundaries = images[0].shape[1]
-    # Image 1
-    img1_x_min = 65
-    img1_x_max = boundaries - 50
-    img1_y_min = 5
-    img1_y_max = images[0].shape[0] - 10
-    # Image 2
-    img2_x_min = 50
-    img2_x_max = boundaries - 55
-    img2_y_min = 0
-    img2_y_max = images[1].shape[0] - 20
-
-    
-    # 3. Filter Keypoints and Descriptors
-    #    Iterate through the keypoints for Image 1:
-    #      - Check if kp.pt[0] (x-coordinate) is within [img1_x_min, img1_x_max].
-    #      - If yes, keep the keypoint and its corresponding descriptor.
-    #    Repeat for Image 2 using its specific cutoff values.
-    #    IMPORTANT: Ensure keypoints and descriptors remain synchronized (same indices).
-    for i in kps:
-        for j in kps[i]:
-
-
-
-    
-    # 4. Match Descriptors
-    #    Use BFMatcher (as in prePipeline) to match the *filtered* descriptors.
-    
-    # 5. Compute Homography (RANSAC)
-    #    Use the filtered matches to compute the homography matrix, 
-    #    similar to pipelineA2().
-    pass
+        results = extractor.run([ExtractionJob(i, detectorName) for i in images])
+        filtered = [filter_in_box(r.keypoints, r.descriptors, *box)
+                    for r, box in zip(results, boxes)]
+    kps = [k.to_cv() for k, _ in filtered]
+    descs = [d for _, d in filtered]
+
+    # 4. Match the filtered descriptors
+    matches = MatchIndex(descs[1], detectorName, matcher).match(descs[0])
+
+    # 5. Homography and inlier/outlier drawing, as in pipelineA2()
+    #    (estimatorOptions: estimator, threshold, confidence, maxIters)
+    return pipelineA2(images, kps, matches, **estimatorOptions)
+
+def writeDrawing(writer, drawing, prefix):
+    """Queue the requested renders of a MatchDrawing for writing."""
+    if SAVE_FULL_RESOLUTION:
+        writer.write(f"{prefix}Matches.jpg", drawing.render())
+    if SAVE_SEPARATE:
+        writer.write(f"{prefix}Inliers.jpg", drawing.render(outliers=False))
+        writer.write(f"{prefix}Outliers.jpg", drawing.render(inliers=False))
+    if PREVIEW_WIDTH:
+        writer.write(f"{prefix}Preview.jpg", drawing.preview(PREVIEW_WIDTH))
 
 def main():
     image_paths = ["img1.jpg", "img2.jpg"]
     images = [loadImage(path) for path in image_paths]
-    matches = prePipeline(images, "FLANN")
-    
-    # Pipeline A1
-    result_image = pipelineA1(images, matches[1], matches[2], matches[0])
-    cv2.imwrite("A1DistanceFiltered.jpg", result_image)
-
-    # Pipeline A2
-    H_A, inliers_img, outliers_img = pipelineA2(images, matches[1], matches[0])
-    
-    if H_A is not None:
-        print("Pipeline A2\n")
-        print("Homography Matrix H_A:\n", H_A)
-        cv2.imwrite("A2Inliers.jpg", inliers_img)
-        cv2.imwrite("A2Outliers.jpg", outliers_img)
-
-    # Pipeline B
-    HA, inliersImgB, outliersImgB = pipelineB
-    if HA is not None:
-        print("Pipeline B\n")
-        print("Homography Matrix H_A:\n", HA)
-        cv2.imwrite("A2Inliers.jpg", inliers_img)
-        cv2.imwrite("A2Outliers.jpg", outliers_img)
-
-    cv2.waitKey(0)
-    cv2.destroyAllWindows()
+    matches, kps, descs, index = prePipeline(images, "SIFT", matcher="FLANN")
+
+    # JPEG encoding and writing happen on a background thread
+    with BackgroundImageWriter() as writer:
+        # Pipeline A1
+        result_image = pipelineA1(images, kps, matches)
+        writer.write("A1DistanceFiltered.jpg", result_image)
+
+        # Pipeline A2
+        H_A, drawingA = pipelineA2(images, kps, matches)
+        if H_A is not None:
+            print("Pipeline A2\n")
+            print("Homography Matrix H_A:\n", H_A)
+            writeDrawing(writer, drawingA, "A2")
+
+        # Pipeline B
+        H_B, drawingB = pipelineB(images, "SIFT", matcher="FLANN")
+        if H_B is not None:
+            print("Pipeline B\n")
+            print("Homography Matrix H_B:\n", H_B)
+            writeDrawing(writer, drawingB, "B")
+
+    for path, error in writer.errors:
+        print(f"Could not write {path}: {error}")
+    if writer.dropped:
+        print(f"{writer.dropped} images were dropped (writer queue full)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
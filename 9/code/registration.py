@@ -0,0 +1,254 @@
+"""Register a sequence of images to a reference frame.
+
+lab9.py registers one pair. RegistrationEngine runs the same steps
+(features, matching, robust homography) over a whole sequence:
+
+1. extract   features for every image concurrently (FeatureExtractor, cached)
+2. pairs     candidate pairs only: adjacent frames, or each frame's top-k
+             most similar frames by a 32x32 thumbnail correlation
+3. match     Lowe-ratio + mutual matches and a homography for every
+             candidate pair, concurrently
+4. chain     homographies composed along a maximum spanning tree (edge
+             weight = inlier count) rooted at the reference frame, giving
+             one image -> reference transform per frame
+
+Matching is limited to O(n) candidate pairs instead of all n^2 / 2, so the
+total time grows about linearly with the number of images. Every stage is
+timed.
+
+    python registration.py frame*.jpg --reference 0 --pairs similar
+    python registration.py --synthetic 16         # shifted crops of img1.jpg
+    python registration.py --scaling 4 8 16 32    # time per image vs. count
+"""
+
+import argparse
+import heapq
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Repository root, so the shared helpers in common/ can be imported
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+import lab9
+from common.extraction import ExtractionJob, FeatureExtractor
+from common.homography import estimate_homography
+from common.matching import MatchSets
+
+PAIR_MODES = ("adjacent", "similar")
+
+
+def thumbnailDescriptor(image, size=32):
+    """Zero-mean, unit-norm thumbnail used as a cheap global image signature."""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    thumb = cv2.resize(image, (size, size), interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+    thumb -= thumb.mean()
+    return thumb / (np.linalg.norm(thumb) or 1.0)
+
+
+def candidatePairs(images, mode="adjacent", topK=2):
+    """(i, j) pairs with i < j worth matching.
+
+    "adjacent" pairs every frame with the next one. "similar" pairs every
+    frame with its topK most correlated thumbnails, which also covers loops
+    and unordered image sets.
+    """
+    n = len(images)
+    if mode == "adjacent":
+        return [(i, i + 1) for i in range(n - 1)]
+    if mode != "similar":
+        raise ValueError(f"Unknown pair mode {mode!r}, expected one of {PAIR_MODES}")
+    thumbs = np.stack([thumbnailDescriptor(i) for i in images])
+    similarity = thumbs @ thumbs.T
+    np.fill_diagonal(similarity, -np.inf)
+    k = min(topK, n - 1)
+    nearest = np.argsort(-similarity, axis=1)[:, :k]
+    return sorted({(min(i, j), max(i, j)) for i in range(n) for j in nearest[i]})
+
+
+def chainToReference(n, edges, reference=0):
+    """image -> reference homographies from pairwise ones.
+
+    Args:
+        edges: {(i, j): (H mapping i to j, weight)}
+    Returns:
+        List of 3x3 matrices (None for frames not connected to the reference).
+    """
+    # neighbours[i]: (j, H mapping j into i, weight)
+    neighbours = {i: [] for i in range(n)}
+    for (i, j), (H, weight) in edges.items():
+        neighbours[j].append((i, H, weight))
+        neighbours[i].append((j, np.linalg.inv(H), weight))
+
+    # Prim's algorithm (max weight): attach each frame through its strongest link
+    transforms = [None] * n
+    transforms[reference] = np.eye(3)
+    heap = [(-w, k, nxt, reference, H) for k, (nxt, H, w) in enumerate(neighbours[reference])]
+    order = len(heap)
+    heapq.heapify(heap)
+    while heap:
+        _, _, node, parent, H_nodeToParent = heapq.heappop(heap)
+        if transforms[node] is not None:
+            continue
+        H = transforms[parent] @ H_nodeToParent
+        transforms[node] = H / H[2, 2]
+        for nxt, H_nextToNode, w in neighbours[node]:
+            if transforms[nxt] is None:
+                heapq.heappush(heap, (-w, order, nxt, node, H_nextToNode))
+                order += 1
+    return transforms
+
+
+class RegistrationEngine:
+    """Extract, match and chain homographies for a sequence of images."""
+
+    def __init__(self, detector="SIFT", matcher="FLANN", pairs="adjacent", topK=2,
+                 estimator="MAGSAC", threshold=5.0, minInliers=12, reference=0,
+                 workers=None, extractor=None):
+        self.detector = detector
+        self.matcher = matcher
+        self.pairs = pairs
+        self.topK = topK
+        self.estimator = estimator
+        self.threshold = threshold
+        self.minInliers = minInliers
+        self.reference = reference
+        self.workers = workers
+        self.extractor = extractor or FeatureExtractor(workers=workers, cache=lab9.featureCache)
+
+    def registerPair(self, featuresA, featuresB):
+        """Homography A -> B from two (KeypointArray, descriptors) pairs, or None."""
+        (kpsA, descA), (kpsB, descB) = featuresA, featuresB
+        if descA is None or descB is None or len(kpsA) < 4 or len(kpsB) < 4:
+            return None
+        sets = MatchSets(descA, descB, self.detector, self.matcher)
+        matches = sets.indices(sets.masks["ratio"] & sets.masks["symmetry"])
+        src = kpsA.pt[matches.query_idx]
+        dst = kpsB.pt[matches.train_idx]
+        result = estimate_homography(src, dst, self.estimator, self.threshold)
+        if result.H is None or result.inliers.sum() < self.minInliers:
+            return None
+        return result
+
+    def register(self, images):
+        """Register every image to images[self.reference].
+
+        Returns a dict with
+            transforms: image -> reference 3x3 homography per image (None if
+                the image could not be connected)
+            pairs: {(i, j): HomographyResult or None} for every candidate pair
+            timings: seconds per stage
+        """
+        timings = {}
+        start = time.perf_counter()
+        results = self.extractor.run([ExtractionJob(i, self.detector) for i in images])
+        features = [(r.keypoints, r.descriptors) for r in results]
+        timings["extract"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pairs = candidatePairs(images, self.pairs, self.topK)
+        timings["pairs"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(self.workers) as pool:
+            estimates = list(pool.map(lambda p: self.registerPair(features[p[0]], features[p[1]]),
+                                      pairs))
+        timings["match"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        edges = {p: (e.H, int(e.inliers.sum())) for p, e in zip(pairs, estimates) if e is not None}
+        transforms = chainToReference(len(images), edges, self.reference)
+        timings["chain"] = time.perf_counter() - start
+        timings["total"] = sum(timings.values())
+
+        return {"transforms": transforms, "pairs": dict(zip(pairs, estimates)), "timings": timings}
+
+
+def _bounce(offset, span):
+    """offset folded back and forth over [0, span], like a ping-pong pan."""
+    if span <= 0:
+        return 0
+    offset %= 2 * span
+    return offset if offset <= span else 2 * span - offset
+
+
+def syntheticSequence(image, count, size=(640, 480), step=(24, 12)):
+    """Shifted crops of one image plus the true frame -> frame 0 translations.
+
+    The crop pans by step per frame and reverses at the image borders
+    instead of wrapping around, so adjacent crops always overlap however
+    long the sequence is.
+    """
+    w, h = size
+    frames, truth = [], []
+    for k in range(count):
+        x = _bounce(k * step[0], image.shape[1] - w)
+        y = _bounce(k * step[1], image.shape[0] - h)
+        frames.append(np.ascontiguousarray(image[y:y + h, x:x + w]))
+        truth.append((x, y))
+    return frames, [(x - truth[0][0], y - truth[0][1]) for x, y in truth]
+
+
+def printReport(result, truth=None):
+    timings = result["timings"]
+    print("Stage timings: " + ", ".join(f"{k} {v * 1000:.1f} ms" for k, v in timings.items()))
+    linked = sum(e is not None for e in result["pairs"].values())
+    print(f"Pairs matched: {linked}/{len(result['pairs'])}")
+    for i, H in enumerate(result["transforms"]):
+        if H is None:
+            print(f"  frame {i:3d}: not registered")
+            continue
+        line = f"  frame {i:3d}: translation ({H[0, 2]:8.2f}, {H[1, 2]:8.2f})"
+        if truth is not None:
+            # Crop k is offset by truth[k] from crop 0, so it maps to frame 0 by +truth[k]
+            error = np.hypot(H[0, 2] - truth[i][0], H[1, 2] - truth[i][1])
+            line += f" | error {error:6.2f} px"
+        print(line)
+
+
+def scalingReport(engine, image, counts):
+    """Register synthetic sequences of several lengths; print time per image."""
+    print(f"{'images':>7} | {'pairs':>5} | {'total ms':>9} | {'ms/image':>8}")
+    for count in counts:
+        frames, _ = syntheticSequence(image, count)
+        engine.extractor.cache = None  # time real extraction, not cache hits
+        result = engine.register(frames)
+        total = result["timings"]["total"] * 1000
+        print(f"{count:7d} | {len(result['pairs']):5d} | {total:9.1f} | {total / count:8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Register an image sequence to a reference frame.")
+    parser.add_argument("images", nargs="*")
+    parser.add_argument("--synthetic", type=int, metavar="N",
+                        help="register N shifted crops of img1.jpg (known ground truth)")
+    parser.add_argument("--detector", default="SIFT")
+    parser.add_argument("--matcher", default="FLANN")
+    parser.add_argument("--pairs", default="adjacent", choices=PAIR_MODES)
+    parser.add_argument("--top-k", type=int, default=2)
+    parser.add_argument("--reference", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--scaling", type=int, nargs="+", metavar="N",
+                        help="time synthetic sequences of these lengths")
+    args = parser.parse_args()
+    engine = RegistrationEngine(args.detector, args.matcher, args.pairs, args.top_k,
+                                reference=args.reference, workers=args.workers)
+
+    if args.scaling:
+        scalingReport(engine, lab9.loadImage("img1.jpg"), args.scaling)
+        return
+
+    truth = None
+    if args.synthetic:
+        images, truth = syntheticSequence(lab9.loadImage("img1.jpg"), args.synthetic)
+    else:
+        images = [lab9.loadImage(p) for p in args.images or ["img1.jpg", "img2.jpg"]]
+    printReport(engine.register(images), truth if args.reference == 0 else None)
+
+
+if __name__ == "__main__":
+    main()
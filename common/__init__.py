@@ -0,0 +1,5 @@
+"""Helpers shared by the lab scripts.
+
+The lab folders are plain script directories, so scripts that use these
+modules put the repository root on sys.path before importing ``common``.
+"""
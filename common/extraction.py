@@ -0,0 +1,327 @@
+"""Concurrent feature extraction over batches of (image, detector) jobs.
+
+Lab 8 and Lab 9 run detectAndCompute image after image. FeatureExtractor
+runs a batch of ExtractionJob on a thread pool (detectAndCompute releases
+the GIL) or a process pool, and returns ExtractionResult in input order.
+
+OpenCV parallelizes inside detectAndCompute as well, so running W jobs at
+once with OpenCV's default thread count would put W x cores threads on the
+CPU. While a batch runs, each worker is limited to cores // W OpenCV
+threads (cv2.setNumThreads is process-wide: the thread pool sets it for
+the batch and restores it afterwards; pool processes set it at startup).
+
+With a FeatureCache, lookups happen in the calling process and only the
+misses are extracted.
+
+Large images can be extracted in tiles (tile_size=...): each tile is a
+core square plus `overlap` pixels of context on every side, and a tile
+only keeps the keypoints that fall inside its core. Cores partition the
+image, so no keypoint is reported twice, while features near a core edge
+still see their full neighbourhood. Tiles of every job share the pool, at
+most max_in_flight are submitted at once (so only that many tile copies
+exist in process mode), and an optional per-tile budget keeps the
+strongest keypoints of each tile. A detector's own keypoint cap (nfeatures,
+500 by default for ORB) is split evenly across the tiles of an image, so a
+tiled run returns about as many keypoints as an untiled one instead of the
+cap once per tile.
+
+    python -m common.extraction image1.png image2.png
+"""
+
+import os
+import sys
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from common.feature_cache import create_detector
+from common.keypoints import KeypointArray
+
+ExtractionJob = namedtuple("ExtractionJob", "image detector params mask", defaults=("SIFT", None, None))
+ExtractionJob.__doc__ = "One detectAndCompute call: image, detector name, detector params, mask."
+
+# duration is None for cache hits
+ExtractionResult = namedtuple("ExtractionResult", "keypoints descriptors duration hit")
+
+MODES = ("thread", "process")
+
+
+def extract(job, warmup=0):
+    """Run one job; returns (KeypointArray, descriptors, seconds)."""
+    detector = create_detector(job.detector, job.params)
+    for _ in range(warmup):
+        detector.detectAndCompute(job.image, job.mask)
+    start = time.perf_counter()
+    keypoints, descriptors = detector.detectAndCompute(job.image, job.mask)
+    duration = time.perf_counter() - start
+    return KeypointArray.from_cv(keypoints), descriptors, duration
+
+
+def feature_limit(job):
+    """The job detector's keypoint cap (nfeatures), or None if it has none."""
+    detector = create_detector(job.detector, job.params)
+    getter = getattr(detector, "getMaxFeatures", None) or getattr(detector, "getNFeatures", None)
+    return (getter() if getter is not None else 0) or None
+
+
+def box_mask(shape, x_min=0, x_max=None, y_min=0, y_max=None):
+    """uint8 detection mask that is 255 inside the (inclusive) pixel box.
+
+    Passed as a job's mask, detectAndCompute never detects or describes
+    keypoints outside the box.
+    """
+    h, w = shape[:2]
+    x_max = w - 1 if x_max is None else x_max
+    y_max = h - 1 if y_max is None else y_max
+    mask = np.zeros((h, w), dtype=np.uint8)
+    mask[max(int(y_min), 0):int(y_max) + 1, max(int(x_min), 0):int(x_max) + 1] = 255
+    return mask
+
+
+def tile_grid(shape, tile_size, overlap=0):
+    """Tiles covering an image as (core, padded) boxes of (x0, y0, x1, y1).
+
+    Cores are tile_size squares (smaller at the right/bottom edges) that
+    partition the image; padded boxes extend them by overlap, clipped to
+    the image.
+    """
+    h, w = shape[:2]
+    tiles = []
+    for y0 in range(0, h, tile_size):
+        for x0 in range(0, w, tile_size):
+            x1, y1 = min(x0 + tile_size, w), min(y0 + tile_size, h)
+            padded = (max(x0 - overlap, 0), max(y0 - overlap, 0),
+                      min(x1 + overlap, w), min(y1 + overlap, h))
+            tiles.append(((x0, y0, x1, y1), padded))
+    return tiles
+
+
+def crop_job(job, box):
+    """The job restricted to box (image and mask cropped, params unchanged)."""
+    x0, y0, x1, y1 = box
+    mask = None if job.mask is None else job.mask[y0:y1, x0:x1]
+    return job._replace(image=job.image[y0:y1, x0:x1], mask=mask)
+
+
+def extract_tile(job, core, padded, budget=None, warmup=0):
+    """Extract a cropped tile and keep the keypoints inside its core.
+
+    Args:
+        job: Job already cropped to the padded box (see crop_job)
+        core, padded: Boxes from tile_grid, in image coordinates
+        budget: Keep at most this many keypoints (strongest first); also
+            replaces the detector's nfeatures for the tile
+
+    Returns:
+        (KeypointArray in image coordinates, descriptors, seconds)
+    """
+    if budget is not None:
+        # Ask the detector for enough features that the core still gets its
+        # share after the overlap margin is dropped
+        area = (padded[2] - padded[0]) * (padded[3] - padded[1])
+        core_area = (core[2] - core[0]) * (core[3] - core[1])
+        nfeatures = int(np.ceil(budget * area / max(core_area, 1)))
+        job = job._replace(params=dict(job.params or {}, nfeatures=nfeatures))
+    keypoints, descriptors, duration = extract(job, warmup)
+    keypoints.x += padded[0]
+    keypoints.y += padded[1]
+    # Half-open core bounds: a keypoint on a shared edge belongs to one tile
+    keep = np.flatnonzero((keypoints.x >= core[0]) & (keypoints.x < core[2])
+                          & (keypoints.y >= core[1]) & (keypoints.y < core[3]))
+    if budget is not None and len(keep) > budget:
+        keep = keep[keypoints[keep].top_k_indices(budget)]
+    keypoints = keypoints[keep]
+    descriptors = descriptors[keep] if descriptors is not None and len(keep) else None
+    return keypoints, descriptors, duration
+
+
+def merge_tiles(tiles):
+    """Concatenate extract_tile results of one image; duration is their total."""
+    keypoints = KeypointArray.concatenate(t[0] for t in tiles)
+    descriptors = [t[1] for t in tiles if t[1] is not None]
+    descriptors = np.concatenate(descriptors) if descriptors else None
+    return keypoints, descriptors, sum(t[2] for t in tiles)
+
+
+def _bounded_map(pool, fn, tasks, limit):
+    """pool.map(fn, *tasks) in order, with at most limit tasks submitted at a time."""
+    window = deque()
+    for task in tasks:
+        if len(window) >= limit:
+            yield window.popleft().result()
+        window.append(pool.submit(fn, *task))
+    while window:
+        yield window.popleft().result()
+
+
+def _init_process(opencv_threads):
+    cv2.setNumThreads(opencv_threads)
+
+
+class FeatureExtractor:
+    """Runs extraction jobs concurrently with OpenCV's threads shared out."""
+
+    def __init__(self, workers=None, mode="thread", cache=None, warmup=0,
+                 tile_size=None, overlap=64, tile_budget=None, max_in_flight=None):
+        """
+        Args:
+            workers: Pool size (default: one per CPU, capped at the number
+                of jobs or tiles)
+            mode: "thread" or "process"
+            cache: Optional FeatureCache consulted before extracting
+            warmup: Untimed detectAndCompute calls before the timed one
+            tile_size: Extract in tile_size x tile_size tiles (None: whole image)
+            overlap: Context pixels around each tile core
+            tile_budget: Maximum keypoints kept per tile (None: no limit)
+            max_in_flight: Tasks submitted at once (default: 2 x workers)
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+        self.workers = workers
+        self.mode = mode
+        self.cache = cache
+        self.warmup = warmup
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.tile_budget = tile_budget
+        self.max_in_flight = max_in_flight
+        self.last_wall_time = None
+
+    def _pool_size(self, tasks):
+        return max(1, min(self.workers or os.cpu_count() or 1, tasks))
+
+    def _cache_params(self, job):
+        """Detector params plus the tiling, which changes the result."""
+        if self.tile_size is None:
+            return job.params
+        return dict(job.params or {}, _tiles=[self.tile_size, self.overlap, self.tile_budget])
+
+    def run(self, jobs):
+        """Extract every job; results come back in the same order as jobs."""
+        jobs = [job if isinstance(job, ExtractionJob) else ExtractionJob(*job) for job in jobs]
+        start = time.perf_counter()
+        results = [None] * len(jobs)
+        keys = [None] * len(jobs)
+        pending = []
+        for i, job in enumerate(jobs):
+            if self.cache is not None:
+                keys[i] = self.cache.key(job.image, job.detector, self._cache_params(job), job.mask)
+                cached = self.cache.get(keys[i])
+                if cached is not None:
+                    results[i] = ExtractionResult(cached[0], cached[1], None, True)
+                    continue
+            pending.append(i)
+
+        if pending:
+            extracted = self._extract_all([jobs[i] for i in pending])
+            for i, (keypoints, descriptors, duration) in zip(pending, extracted):
+                if self.cache is not None:
+                    self.cache.put(keys[i], keypoints, descriptors)
+                results[i] = ExtractionResult(keypoints, descriptors, duration, False)
+
+        self.last_wall_time = time.perf_counter() - start
+        return results
+
+    def _extract_all(self, jobs):
+        if self.tile_size is None:
+            return self._map(extract, ((job, self.warmup) for job in jobs), len(jobs))
+        grids = [tile_grid(job.image.shape, self.tile_size, self.overlap) for job in jobs]
+        budgets = [self._tile_budget(job, len(grid)) for job, grid in zip(jobs, grids)]
+        # Tiles are cropped as they are submitted, so only the tiles in
+        # flight are copied (process mode) rather than every tile up front
+        tasks = ((crop_job(job, padded), core, padded, budget, self.warmup)
+                 for job, grid, budget in zip(jobs, grids, budgets) for core, padded in grid)
+        tiles = iter(self._map(extract_tile, tasks, sum(map(len, grids))))
+        return [merge_tiles([next(tiles) for _ in grid]) for grid in grids]
+
+    def _tile_budget(self, job, tiles):
+        """Per-tile keypoint budget: tile_budget, capped at the tile's share of nfeatures."""
+        limit = feature_limit(job)
+        if limit is None:
+            return self.tile_budget
+        share = -(-limit // tiles)
+        return share if self.tile_budget is None else min(self.tile_budget, share)
+
+    def _map(self, fn, tasks, count):
+        """fn(*task) for each of count tasks on the pool, results in order."""
+        workers = self._pool_size(count)
+        if workers == 1:
+            return [fn(*task) for task in tasks]
+        opencv_threads = max(1, (os.cpu_count() or 1) // workers)
+        limit = self.max_in_flight or 2 * workers
+        if self.mode == "process":
+            with ProcessPoolExecutor(workers, initializer=_init_process,
+                                     initargs=(opencv_threads,)) as pool:
+                return list(_bounded_map(pool, fn, tasks, limit))
+        previous = cv2.getNumThreads()
+        cv2.setNumThreads(opencv_threads)
+        try:
+            with ThreadPoolExecutor(workers) as pool:
+                return list(_bounded_map(pool, fn, tasks, limit))
+        finally:
+            cv2.setNumThreads(previous)
+
+    def compare_serial(self, jobs):
+        """Wall time of this extractor against one-task-at-a-time extraction.
+
+        The serial run uses the same tile settings, so the speedup is from
+        parallelism alone and both runs find the same keypoints. When tiling
+        is on, an untiled serial run is timed as well and the effect of
+        tiling is reported separately. The cache is bypassed for every run.
+
+        Returns a dict with serial and parallel seconds and the speedup, plus
+        serial_untiled seconds, tiling_speedup and the tiled/untiled keypoint
+        totals when tiling is on.
+        """
+        jobs = [job if isinstance(job, ExtractionJob) else ExtractionJob(*job) for job in jobs]
+        tiling = dict(tile_size=self.tile_size, overlap=self.overlap, tile_budget=self.tile_budget)
+        serial = FeatureExtractor(workers=1, warmup=self.warmup, **tiling)
+        parallel = FeatureExtractor(self.workers, self.mode, warmup=self.warmup,
+                                    max_in_flight=self.max_in_flight, **tiling)
+        tiled_results = serial.run(jobs)
+        parallel.run(jobs)
+        tasks = len(jobs)
+        if self.tile_size is not None:
+            tasks = sum(len(tile_grid(job.image.shape, self.tile_size)) for job in jobs)
+        comparison = {
+            "jobs": len(jobs),
+            "workers": self._pool_size(tasks),
+            "mode": self.mode,
+            "serial": serial.last_wall_time,
+            "parallel": parallel.last_wall_time,
+            "speedup": serial.last_wall_time / parallel.last_wall_time,
+        }
+        if self.tile_size is not None:
+            untiled = FeatureExtractor(workers=1, warmup=self.warmup)
+            untiled_results = untiled.run(jobs)
+            comparison["serial_untiled"] = untiled.last_wall_time
+            comparison["tiling_speedup"] = untiled.last_wall_time / serial.last_wall_time
+            comparison["keypoints_tiled"] = sum(len(r.keypoints) for r in tiled_results)
+            comparison["keypoints_untiled"] = sum(len(r.keypoints) for r in untiled_results)
+        return comparison
+
+
+def print_comparison(comparison):
+    print(f"Jobs:      {comparison['jobs']} ({comparison['workers']} {comparison['mode']} workers)")
+    if "serial_untiled" in comparison:
+        print(f"Untiled:   {comparison['serial_untiled']:.3f} s (serial)")
+        print(f"Tiling:    {comparison['tiling_speedup']:.2f}x (serial, tiled vs. untiled)")
+        print(f"Keypoints: {comparison['keypoints_tiled']} tiled, "
+              f"{comparison['keypoints_untiled']} untiled")
+    print(f"Serial:    {comparison['serial']:.3f} s")
+    print(f"Parallel:  {comparison['parallel']:.3f} s")
+    print(f"Speedup:   {comparison['speedup']:.2f}x")
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:]
+    if not paths:
+        sys.exit("usage: python -m common.extraction IMAGE [IMAGE ...]")
+    images = [cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in paths]
+    batch = [ExtractionJob(image, detector) for detector in ("SIFT", "ORB") for image in images]
+    for mode in MODES:
+        print_comparison(FeatureExtractor(mode=mode).compare_serial(batch))
+        print()
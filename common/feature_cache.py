@@ -0,0 +1,207 @@
+"""Content-addressed on-disk cache for keypoints and descriptors.
+
+The lab scripts rerun detectAndCompute on the same images every time they
+execute. FeatureCache keys each result by a hash of the image pixels, the
+detector name, its parameters, the mask and the OpenCV version, and stores:
+
+    <root>/<key[:2]>/<key>.desc.npy   descriptors (loaded as a read-only memmap)
+    <root>/<key[:2]>/<key>.kp.npz     keypoint columns (written last: marks
+                                      the entry as complete)
+
+Files are written to a temporary name and moved into place with
+os.replace, so concurrent readers (threads or processes) never see a
+partial entry; an entry that disappears while being read is treated as a
+miss. Hits refresh the entry's mtime, and once the cache grows beyond
+max_bytes the least recently used entries are deleted. Eviction also
+removes temporary files left behind by writes that were interrupted (they
+are only swept once older than TEMP_MAX_AGE, so a write in progress in
+another process is never touched).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from common.keypoints import KeypointArray
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / ".feature_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Seconds before an unfinished .tmp-* file is considered orphaned
+TEMP_MAX_AGE = 3600
+
+DETECTORS = {
+    "SIFT": cv2.SIFT_create,
+    "ORB": cv2.ORB_create,
+}
+
+
+def create_detector(name, params=None):
+    """Create a detector by name ("SIFT" or "ORB") with keyword parameters."""
+    try:
+        factory = DETECTORS[name.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown detector {name!r}, expected one of {list(DETECTORS)}") from None
+    return factory(**(params or {}))
+
+
+def image_hash(image):
+    """Hash of an image's pixels, shape and dtype."""
+    image = np.ascontiguousarray(image)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{image.shape}{image.dtype}".encode())
+    h.update(image.data)
+    return h.hexdigest()
+
+
+class FeatureCache:
+    """LRU-bounded on-disk cache of detectAndCompute results."""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, image, detector, params=None, mask=None):
+        """Cache key for one image/detector/parameter combination."""
+        h = hashlib.blake2b(digest_size=20)
+        h.update(image_hash(image).encode())
+        h.update(detector.upper().encode())
+        h.update(json.dumps(params or {}, sort_keys=True).encode())
+        h.update(cv2.__version__.encode())
+        if mask is not None:
+            h.update(image_hash(mask).encode())
+        return h.hexdigest()
+
+    def _paths(self, key):
+        folder = self.root / key[:2]
+        return folder / f"{key}.kp.npz", folder / f"{key}.desc.npy"
+
+    def get(self, key):
+        """Return (KeypointArray, descriptors) for key, or None on a miss."""
+        kp_path, desc_path = self._paths(key)
+        try:
+            with np.load(kp_path) as columns:
+                keypoints = KeypointArray.from_dict(columns)
+            descriptors = np.load(desc_path, mmap_mode="r") if len(keypoints) else None
+            os.utime(kp_path)  # LRU: mark as recently used
+        except (FileNotFoundError, ValueError, EOFError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return keypoints, descriptors
+
+    def put(self, key, keypoints, descriptors):
+        """Store a result (keypoints as KeypointArray or cv2.KeyPoint list)."""
+        if not isinstance(keypoints, KeypointArray):
+            keypoints = KeypointArray.from_cv(keypoints)
+        kp_path, desc_path = self._paths(key)
+        kp_path.parent.mkdir(parents=True, exist_ok=True)
+        if descriptors is None:
+            descriptors = np.empty((0, 0), dtype=np.uint8)
+        # Descriptors first: the keypoint file is what marks an entry complete
+        self._atomic_write(desc_path, lambda f: np.save(f, np.ascontiguousarray(descriptors)))
+        self._atomic_write(kp_path, lambda f: np.savez(f, **keypoints.to_dict()))
+        self._evict()
+
+    @staticmethod
+    def _atomic_write(path, write):
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=path.suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _entries(self):
+        """(mtime, size, kp_path, desc_path) for every entry.
+
+        Includes keypoint files whose descriptors are gone (an eviction that
+        failed halfway), so the next eviction removes them too.
+        """
+        entries = []
+        for kp_path in self.root.glob("*/*.kp.npz"):
+            desc_path = kp_path.with_name(kp_path.name.replace(".kp.npz", ".desc.npy"))
+            try:
+                stat = kp_path.stat()
+            except FileNotFoundError:
+                continue
+            try:
+                size = stat.st_size + desc_path.stat().st_size
+            except FileNotFoundError:
+                size = stat.st_size
+            entries.append((stat.st_mtime, size, kp_path, desc_path))
+        return entries
+
+    def size(self):
+        """Total bytes used by cached entries."""
+        return sum(size for _, size, _, _ in self._entries())
+
+    def _sweep_temp(self):
+        cutoff = time.time() - TEMP_MAX_AGE
+        for path in self.root.glob("*/.tmp-*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                continue
+
+    def _evict(self):
+        with self._lock:
+            self._sweep_temp()
+            entries = sorted(self._entries(), key=lambda e: e[0])
+            total = sum(size for _, size, _, _ in entries)
+            for _, size, kp_path, desc_path in entries:
+                if total <= self.max_bytes:
+                    break
+                # Descriptors first: put() writes them before the keypoint
+                # file, so a descriptor file on its own may be an entry still
+                # being written and is never swept
+                try:
+                    desc_path.unlink(missing_ok=True)
+                    kp_path.unlink()
+                except OSError:
+                    # Already evicted by another process, or still memory
+                    # mapped by a reader (Windows); try again next time
+                    continue
+                total -= size
+
+    def clear(self):
+        for _, _, kp_path, desc_path in self._entries():
+            for path in (kp_path, desc_path):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def detect_and_compute(self, image, detector="SIFT", params=None, mask=None):
+        """Cached detectAndCompute.
+
+        Returns:
+            (KeypointArray, descriptors, hit): descriptors is a read-only
+            memmap on a hit (None if no keypoints were found) and hit tells
+            whether extraction was skipped.
+        """
+        key = self.key(image, detector, params, mask)
+        cached = self.get(key)
+        if cached is not None:
+            return cached[0], cached[1], True
+        keypoints, descriptors = create_detector(detector, params).detectAndCompute(image, mask)
+        keypoints = KeypointArray.from_cv(keypoints)
+        self.put(key, keypoints, descriptors)
+        return keypoints, descriptors, False
@@ -0,0 +1,120 @@
+"""Robust homography estimation with per-run instrumentation.
+
+cv2.findHomography supports several robust estimators besides RANSAC:
+least median of squares (LMEDS), PROSAC-based RHO and the USAC family
+(MAGSAC++, USAC_FAST, USAC_ACCURATE, ...). estimate_homography() runs any
+of them with explicit confidence / iteration limits and reports how long it
+took, what fraction of the matches it kept and how well the inliers fit.
+compare_estimators() runs several on the same matches, so the fastest one
+that is accurate enough for an image pair can be picked.
+"""
+
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+# Estimators available in this OpenCV build (the USAC ones need 4.5+)
+ESTIMATORS = {
+    name: getattr(cv2, flag)
+    for name, flag in (
+        ("RANSAC", "RANSAC"),
+        ("LMEDS", "LMEDS"),
+        ("RHO", "RHO"),
+        ("USAC_DEFAULT", "USAC_DEFAULT"),
+        ("USAC_FAST", "USAC_FAST"),
+        ("USAC_ACCURATE", "USAC_ACCURATE"),
+        ("USAC_PROSAC", "USAC_PROSAC"),
+        ("MAGSAC", "USAC_MAGSAC"),
+    )
+    if hasattr(cv2, flag)
+}
+
+HomographyResult = namedtuple(
+    "HomographyResult",
+    "H inliers method seconds inlier_ratio reprojection_error",
+)
+HomographyResult.__doc__ = """Outcome of one estimator run.
+
+H is None if estimation failed; inliers is a boolean mask over the input
+matches and reprojection_error the mean inlier distance in pixels between
+H applied to src and dst.
+"""
+
+
+def reprojection_errors(H, src, dst):
+    """Pixel distance between H applied to every src point and its dst point."""
+    projected = cv2.perspectiveTransform(np.asarray(src, dtype=np.float32).reshape(-1, 1, 2), H)
+    return np.linalg.norm(projected.reshape(-1, 2) - np.asarray(dst).reshape(-1, 2), axis=1)
+
+
+def estimate_homography(src, dst, method="RANSAC", threshold=10.0, confidence=0.995, max_iters=2000):
+    """Estimate a homography src -> dst with the named robust estimator.
+
+    Args:
+        src, dst: Matched points, (N, 1, 2) or (N, 2)
+        method: Key of ESTIMATORS
+        threshold: Inlier reprojection threshold in pixels (not used by LMEDS)
+        confidence: Desired probability that the result is outlier-free
+        max_iters: Iteration cap for the sampling estimators
+    """
+    try:
+        flag = ESTIMATORS[method.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown estimator {method!r}, expected one of {list(ESTIMATORS)}") from None
+    src = np.asarray(src, dtype=np.float32).reshape(-1, 1, 2)
+    dst = np.asarray(dst, dtype=np.float32).reshape(-1, 1, 2)
+    if len(src) < 4:
+        return HomographyResult(None, np.zeros(len(src), dtype=bool), method, 0.0, 0.0, None)
+
+    start = time.perf_counter()
+    H, mask = cv2.findHomography(src, dst, flag, ransacReprojThreshold=threshold,
+                                 maxIters=max_iters, confidence=confidence)
+    seconds = time.perf_counter() - start
+    if H is None:
+        return HomographyResult(None, np.zeros(len(src), dtype=bool), method, seconds, 0.0, None)
+
+    inliers = mask.ravel().astype(bool)
+    error = float(reprojection_errors(H, src[inliers], dst[inliers]).mean()) if inliers.any() else None
+    return HomographyResult(H, inliers, method, seconds, float(inliers.mean()), error)
+
+
+def compare_estimators(src, dst, methods=None, repeats=3, **options):
+    """Run several estimators on the same matches.
+
+    Each is run `repeats` times and keeps its fastest time (the result
+    itself comes from the last run). options are passed to
+    estimate_homography().
+    """
+    results = []
+    for method in methods or ESTIMATORS:
+        runs = [estimate_homography(src, dst, method, **options) for _ in range(repeats)]
+        results.append(runs[-1]._replace(seconds=min(r.seconds for r in runs)))
+    return results
+
+
+def fastest_accurate(results, max_error, min_inlier_ratio=0.0, min_relative_inliers=0.0):
+    """Fastest result within max_error pixels that kept enough inliers.
+
+    A result must keep at least min_inlier_ratio of the matches and at least
+    min_relative_inliers times the inliers of the best result in results
+    (all results are assumed to come from the same matches). The floors
+    stop an estimator from qualifying by keeping only a handful of points
+    that happen to fit well. Returns None if no result qualifies.
+    """
+    best_ratio = max((r.inlier_ratio for r in results if r.H is not None), default=0.0)
+    floor = max(min_inlier_ratio, min_relative_inliers * best_ratio)
+    accurate = [r for r in results
+                if r.reprojection_error is not None and r.reprojection_error <= max_error
+                and r.inlier_ratio >= floor]
+    return min(accurate, key=lambda r: r.seconds, default=None)
+
+
+def describe(result):
+    """One-line summary of a HomographyResult."""
+    if result.H is None or result.reprojection_error is None:
+        return f"{result.method}: failed ({result.seconds * 1000:.2f} ms)"
+    return (f"{result.method}: {result.seconds * 1000:.2f} ms, "
+            f"inliers {result.inliers.sum()}/{len(result.inliers)} ({result.inlier_ratio:.1%}), "
+            f"reprojection error {result.reprojection_error:.2f} px")
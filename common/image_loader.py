@@ -0,0 +1,179 @@
+"""Cached image decoding.
+
+Every lab script decodes its JPEG/PNG inputs from scratch on each run. The
+ImageLoader stores each decoded array as an .npy file, keyed by the source
+path, size and modification time plus the imread flag, OpenCV version and
+a format version. Later loads memory-map that file, which costs far less
+than decoding.
+
+    <root>/<key[:2]>/<key>.npy
+
+Details:
+
+- A grayscale load decodes the file with IMREAD_GRAYSCALE, like
+  cv2.imread, and caches the single-channel array. Only if the colour
+  decode of the same file is already cached is the grayscale image derived
+  from it with cvtColor, which skips decoding the file a second time. That
+  result can differ from a direct grayscale decode by one level of
+  rounding, and by more around strong colour edges in JPEGs because of
+  chroma upsampling (a few pixels in 10,000 on the lab images).
+- The IMREAD_REDUCED_* flags decode at 1/2, 1/4 or 1/8 size, which is
+  cheap for JPEG. Use them for previews.
+- Loads return copy-on-write memmaps: drawing on a loaded image never
+  changes the cache.
+- Files are written atomically (os.replace).
+- The least recently used entries are removed once the cache grows past
+  max_bytes.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / ".image_cache"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# Part of every key; bumped when the cached content changes for the same
+# file and flags (2: grayscale is decoded directly, not derived from colour)
+CACHE_VERSION = 2
+
+
+class ImageLoader:
+    """cv2.imread with an on-disk cache of decoded arrays."""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, path, flags=cv2.IMREAD_COLOR):
+        """Cache key for a file's current contents decoded with flags (None if missing)."""
+        path = Path(path).resolve()
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        h = hashlib.blake2b(digest_size=20)
+        h.update(f"{CACHE_VERSION}|{path}|{stat.st_size}|{stat.st_mtime_ns}|{flags}|{cv2.__version__}".encode())
+        return h.hexdigest()
+
+    def _path(self, key):
+        return self.root / key[:2] / f"{key}.npy"
+
+    def imread(self, path, flags=cv2.IMREAD_COLOR):
+        """Like cv2.imread (None if the file cannot be read), but cached."""
+        key = self.key(path, flags)
+        if key is None:
+            return None
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        color = None
+        if flags == cv2.IMREAD_GRAYSCALE:
+            color_key = self.key(path, cv2.IMREAD_COLOR)
+            if color_key is not None and self._path(color_key).exists():
+                color = self._get(color_key)
+        if color is not None:
+            image = cv2.cvtColor(np.asarray(color), cv2.COLOR_BGR2GRAY)
+        else:
+            image = cv2.imread(str(path), flags)
+            if image is None:
+                return None
+        self._put(key, image)
+        return image
+
+    def _get(self, key):
+        cache_path = self._path(key)
+        try:
+            image = np.load(cache_path, mmap_mode="c")
+            os.utime(cache_path)  # LRU: mark as recently used
+        except (FileNotFoundError, ValueError, EOFError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return image
+
+    def _put(self, key, image):
+        cache_path = self._path(key)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_path.parent, prefix=".tmp-", suffix=".npy")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(image))
+            os.replace(tmp, cache_path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for path in self.root.glob("*/*.npy"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self):
+        """Total bytes used by cached images."""
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda e: e[0])
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+_default_loader = None
+
+
+def default_loader():
+    """Process-wide ImageLoader on the default cache directory."""
+    global _default_loader
+    if _default_loader is None:
+        _default_loader = ImageLoader()
+    return _default_loader
+
+
+def imread(path, flags=cv2.IMREAD_COLOR):
+    """Cached drop-in for cv2.imread using the default loader."""
+    return default_loader().imread(path, flags)
+
+
+def imread_preview(path, factor=4, color=False):
+    """Image decoded at 1/factor size (2, 4 or 8) with IMREAD_REDUCED_*."""
+    prefix = "IMREAD_REDUCED_COLOR_" if color else "IMREAD_REDUCED_GRAYSCALE_"
+    try:
+        flags = getattr(cv2, f"{prefix}{factor}")
+    except AttributeError:
+        raise ValueError(f"Unsupported reduction factor {factor}, expected 2, 4 or 8") from None
+    return imread(path, flags)
@@ -0,0 +1,87 @@
+"""Background image encoding/writing.
+
+cv2.imwrite encodes and writes synchronously, which stalls whatever loop
+produced the image. BackgroundImageWriter hands that work to a single
+worker thread. When the pending queue is full, write() waits for room, so
+no image is lost; with block=False it drops the image and counts it in
+`dropped` instead.
+"""
+
+import queue
+import threading
+
+import cv2
+
+
+class BackgroundImageWriter:
+    """Write images to disk on a daemon thread.
+
+    Images are written as-is after submission, so callers must not modify an
+    array after passing it to write(). Use as a context manager (or call
+    close()) to flush pending writes before the program exits.
+    """
+
+    def __init__(self, max_pending=64):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.errors = []
+        self._thread = threading.Thread(target=self._run, name="image-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, path, image, scale=1, params=None, block=True):
+        """Queue an image for writing; returns False if it had to be dropped.
+
+        Args:
+            path: Output file path (format is chosen from the extension)
+            image: Image array to write
+            scale: Integer upscale factor applied with INTER_NEAREST on the
+                worker thread (handy for 8x8 previews)
+            params: Optional cv2.imwrite encoding parameters
+            block: Wait while the queue is full (False: drop the image)
+        """
+        try:
+            self._queue.put((str(path), image, scale, params), block=block)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                path, image, scale, params = item
+                try:
+                    if scale != 1:
+                        image = cv2.resize(image, None, fx=scale, fy=scale,
+                                           interpolation=cv2.INTER_NEAREST)
+                    if not cv2.imwrite(path, image, params or []):
+                        raise OSError(f"cv2.imwrite failed for {path}")
+                    with self._lock:
+                        self.written += 1
+                except Exception as e:
+                    with self._lock:
+                        self.errors.append((path, e))
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued image has been written."""
+        self._queue.join()
+
+    def close(self):
+        """Flush pending writes and stop the worker thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,120 @@
+"""Columnar keypoint storage.
+
+OpenCV returns keypoints as a tuple of cv2.KeyPoint objects, so every
+sort, filter or coordinate lookup becomes a Python loop over objects.
+KeypointArray converts them once into parallel NumPy columns (x, y, size,
+angle, response, octave, class_id). Selection, top-K and box filtering are
+then array operations, and cv2.KeyPoint objects are only rebuilt for
+drawing (to_cv()).
+
+Descriptors stay a separate array: index both with the same indices or
+mask (kps[idx], descriptors[idx]) to keep them in sync.
+"""
+
+import cv2
+import numpy as np
+
+FIELDS = ("x", "y", "size", "angle", "response", "octave", "class_id")
+_FLOAT_FIELDS = ("x", "y", "size", "angle", "response")
+
+
+class KeypointArray:
+    """Keypoints stored as one NumPy array per attribute."""
+
+    def __init__(self, x, y, size, angle, response, octave, class_id=None):
+        self.x = np.asarray(x, dtype=np.float32)
+        self.y = np.asarray(y, dtype=np.float32)
+        self.size = np.asarray(size, dtype=np.float32)
+        self.angle = np.asarray(angle, dtype=np.float32)
+        self.response = np.asarray(response, dtype=np.float32)
+        self.octave = np.asarray(octave, dtype=np.int32)
+        if class_id is None:
+            class_id = np.full(len(self.x), -1)
+        self.class_id = np.asarray(class_id, dtype=np.int32)
+        if any(len(getattr(self, f)) != len(self.x) for f in FIELDS):
+            raise ValueError("All keypoint columns must have the same length")
+
+    @classmethod
+    def empty(cls):
+        return cls(*([()] * len(FIELDS)))
+
+    @classmethod
+    def from_cv(cls, keypoints):
+        """Convert a sequence of cv2.KeyPoint in a single pass."""
+        if len(keypoints) == 0:
+            return cls.empty()
+        rows = np.array([(kp.pt[0], kp.pt[1], kp.size, kp.angle, kp.response, kp.octave, kp.class_id)
+                         for kp in keypoints], dtype=np.float64)
+        return cls(*rows.T)
+
+    @classmethod
+    def from_dict(cls, columns, prefix=""):
+        """Rebuild from a mapping such as an np.load() result (see to_dict)."""
+        return cls(*(columns[prefix + f] for f in FIELDS))
+
+    @classmethod
+    def concatenate(cls, arrays):
+        arrays = list(arrays)
+        if not arrays:
+            return cls.empty()
+        return cls(*(np.concatenate([getattr(a, f) for a in arrays]) for f in FIELDS))
+
+    def to_dict(self, prefix=""):
+        """Columns as a dict, e.g. for np.savez(**kps.to_dict('kp_'))."""
+        return {prefix + f: getattr(self, f) for f in FIELDS}
+
+    def to_cv(self):
+        """Rebuild cv2.KeyPoint objects (only needed for drawing/matching APIs)."""
+        return [cv2.KeyPoint(float(x), float(y), float(size), float(angle), float(response),
+                             int(octave), int(class_id))
+                for x, y, size, angle, response, octave, class_id
+                in zip(self.x, self.y, self.size, self.angle, self.response,
+                       self.octave, self.class_id)]
+
+    @property
+    def pt(self):
+        """(N, 2) float32 array of keypoint coordinates."""
+        return np.column_stack([self.x, self.y])
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, index):
+        """Select keypoints with an index array, boolean mask or slice."""
+        if np.isscalar(index):
+            index = [index]
+        return KeypointArray(*(getattr(self, f)[index] for f in FIELDS))
+
+    def top_k_indices(self, k):
+        """Indices of the k strongest keypoints, strongest first.
+
+        np.argpartition finds the k largest responses in O(n); only those k
+        are then sorted.
+        """
+        n = len(self)
+        if k >= n:
+            return np.argsort(-self.response, kind="stable")
+        part = np.argpartition(-self.response, k - 1)[:k]
+        return part[np.argsort(-self.response[part], kind="stable")]
+
+    def top_k(self, k):
+        """The k strongest keypoints as a new KeypointArray."""
+        return self[self.top_k_indices(k)]
+
+    def in_box(self, x_min=-np.inf, x_max=np.inf, y_min=-np.inf, y_max=np.inf):
+        """Boolean mask of keypoints inside [x_min, x_max] x [y_min, y_max]."""
+        return (self.x >= x_min) & (self.x <= x_max) & (self.y >= y_min) & (self.y <= y_max)
+
+    def __repr__(self):
+        return f"KeypointArray({len(self)} keypoints)"
+
+
+def filter_in_box(keypoints, descriptors, x_min=-np.inf, x_max=np.inf, y_min=-np.inf, y_max=np.inf):
+    """Keep the keypoints inside a box together with their descriptor rows.
+
+    Returns (KeypointArray, descriptors); descriptors may be None.
+    """
+    if not isinstance(keypoints, KeypointArray):
+        keypoints = KeypointArray.from_cv(keypoints)
+    keep = keypoints.in_box(x_min, x_max, y_min, y_max)
+    return keypoints[keep], None if descriptors is None else np.asarray(descriptors)[keep]
@@ -0,0 +1,237 @@
+"""Descriptor matchers shared by the Lab 8/9 scripts.
+
+Brute force compares every query descriptor with every train descriptor.
+FLANN instead builds an approximate nearest-neighbour index over the train
+descriptors once: randomized KD-trees for float descriptors (SIFT) and
+locality-sensitive hashing for binary ones (ORB). `checks` trades accuracy
+for speed: it is how many leaves (KD-tree) or buckets (LSH) are visited
+per query.
+
+MatchIndex keeps a trained matcher around, so matching one reference image
+against many others builds the index only once. MatchSets derives every
+Lab 8 filter strategy (raw, distance, ratio, symmetry) from a single kNN
+pass in each direction.
+"""
+
+from itertools import chain
+from operator import attrgetter
+
+import cv2
+import numpy as np
+
+from common.keypoints import KeypointArray
+
+FLANN_INDEX_KDTREE = 1
+FLANN_INDEX_LSH = 6
+
+METHODS = ("BF", "FLANN")
+
+# Default distance-filter cutoffs (L2 for SIFT, Hamming bits for ORB)
+DISTANCE_THRESHOLDS = {
+    "SIFT": 200.0,
+    "ORB": 50.0,
+}
+
+# Descriptor norm per detector (binary detectors use Hamming distance)
+NORMS = {
+    "SIFT": cv2.NORM_L2,
+    "ORB": cv2.NORM_HAMMING,
+}
+
+
+def flann_index_params(detector, trees=5, table_number=6, key_size=12, multi_probe_level=1):
+    """FLANN index parameters suited to a detector's descriptors."""
+    if NORMS[detector.upper()] == cv2.NORM_HAMMING:
+        return dict(algorithm=FLANN_INDEX_LSH, table_number=table_number,
+                    key_size=key_size, multi_probe_level=multi_probe_level)
+    return dict(algorithm=FLANN_INDEX_KDTREE, trees=trees)
+
+
+def create_matcher(method="BF", detector="SIFT", checks=50, cross_check=False, **index_params):
+    """BFMatcher or FlannBasedMatcher for a detector's descriptors.
+
+    Args:
+        method: "BF" or "FLANN"
+        detector: "SIFT" or "ORB" (selects the norm / index type)
+        checks: FLANN search effort (ignored for BF)
+        cross_check: BFMatcher crossCheck (ignored for FLANN)
+        index_params: Overrides for flann_index_params()
+    """
+    method = method.upper()
+    if method == "BF":
+        return cv2.BFMatcher(NORMS[detector.upper()], crossCheck=cross_check)
+    if method == "FLANN":
+        return cv2.FlannBasedMatcher(flann_index_params(detector, **index_params),
+                                     dict(checks=checks))
+    raise ValueError(f"Unknown matcher {method!r}, expected one of {METHODS}")
+
+
+def prepare_descriptors(descriptors, detector):
+    """Descriptors in the dtype the matchers expect (FLANN's KD-tree needs float32)."""
+    if NORMS[detector.upper()] == cv2.NORM_HAMMING:
+        return np.ascontiguousarray(descriptors, dtype=np.uint8)
+    return np.ascontiguousarray(descriptors, dtype=np.float32)
+
+
+class MatchIndex:
+    """A matcher trained once on reference descriptors and queried many times."""
+
+    def __init__(self, descriptors, detector="SIFT", method="FLANN", checks=50, **index_params):
+        self.detector = detector
+        self.method = method
+        self.matcher = create_matcher(method, detector, checks, **index_params)
+        self.matcher.add([prepare_descriptors(descriptors, detector)])
+        self.matcher.train()  # builds the FLANN index now rather than on the first query
+        self.size = len(descriptors)
+
+    def match(self, query):
+        """Best train match for every query descriptor (DMatch list)."""
+        return self.matcher.match(prepare_descriptors(query, self.detector))
+
+    def knn_match(self, query, k=2):
+        """k best train matches per query descriptor.
+
+        LSH may find fewer than k candidates for some queries, so inner
+        lists can be shorter than k.
+        """
+        return self.matcher.knnMatch(prepare_descriptors(query, self.detector), k=k)
+
+
+class MatchArrays:
+    """Matches as parallel queryIdx/trainIdx/distance arrays.
+
+    Converting a DMatch list once turns distance filtering into a mask
+    (arrays[arrays.distance < t]) and point lookup into fancy indexing
+    (see gather_points).
+    """
+
+    def __init__(self, query_idx, train_idx, distance):
+        self.query_idx = np.asarray(query_idx, dtype=np.int64)
+        self.train_idx = np.asarray(train_idx, dtype=np.int64)
+        self.distance = np.asarray(distance, dtype=np.float32)
+
+    @classmethod
+    def from_dmatches(cls, matches):
+        if isinstance(matches, cls):
+            return matches
+        return cls(*_dmatch_fields(matches, ("queryIdx", "trainIdx", "distance")))
+
+    def __getitem__(self, index):
+        """Select matches with a mask, index array or slice."""
+        return MatchArrays(self.query_idx[index], self.train_idx[index], self.distance[index])
+
+    def __len__(self):
+        return len(self.query_idx)
+
+    def to_dmatches(self):
+        """cv2.DMatch list (for drawMatches)."""
+        return [cv2.DMatch(int(q), int(t), float(d))
+                for q, t, d in zip(self.query_idx, self.train_idx, self.distance)]
+
+    def __repr__(self):
+        return f"MatchArrays({len(self)} matches)"
+
+
+def keypoint_coords(keypoints):
+    """(N, 2) float32 coordinates of a KeypointArray or cv2.KeyPoint sequence."""
+    if isinstance(keypoints, KeypointArray):
+        return keypoints.pt
+    if len(keypoints) == 0:
+        return np.empty((0, 2), dtype=np.float32)
+    return cv2.KeyPoint_convert(keypoints).reshape(-1, 2)
+
+
+def gather_points(query_coords, train_coords, matches):
+    """Matched (src, dst) points shaped (N, 1, 2) for cv2.findHomography."""
+    matches = MatchArrays.from_dmatches(matches)
+    src = query_coords[matches.query_idx].reshape(-1, 1, 2)
+    dst = train_coords[matches.train_idx].reshape(-1, 1, 2)
+    return src.astype(np.float32, copy=False), dst.astype(np.float32, copy=False)
+
+
+def _dmatch_fields(matches, names):
+    """One array per DMatch attribute in names (int64 indices, float32 distances).
+
+    The attributes are read by attrgetter inside np.fromiter, so no Python
+    bytecode runs per match; that is several times faster than building a
+    list of per-match tuples.
+    """
+    return [np.fromiter(map(attrgetter(name), matches), count=len(matches),
+                        dtype=np.float32 if name == "distance" else np.int64)
+            for name in names]
+
+
+def knn_to_arrays(knn, k=2):
+    """knnMatch output as (N, k) trainIdx and distance arrays.
+
+    Missing neighbours (LSH can return fewer than k) get index -1 and
+    distance inf.
+    """
+    counts = np.fromiter(map(len, knn), dtype=np.int64, count=len(knn))
+    if len(counts) and counts.max() > k:
+        knn = [neighbours[:k] for neighbours in knn]
+        counts = np.minimum(counts, k)
+    train_idx, distance = _dmatch_fields(list(chain.from_iterable(knn)), ("trainIdx", "distance"))
+    if (counts == k).all():
+        return train_idx.reshape(-1, k), distance.reshape(-1, k)
+    indices = np.full((len(knn), k), -1, dtype=np.int64)
+    distances = np.full((len(knn), k), np.inf, dtype=np.float32)
+    rows = np.repeat(np.arange(len(knn)), counts)
+    cols = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    indices[rows, cols] = train_idx
+    distances[rows, cols] = distance
+    return indices, distances
+
+
+class MatchSets:
+    """Raw, distance, ratio and symmetry match sets from one kNN pass per direction.
+
+    A k=2 knnMatch is run query->train and train->query once; every filter
+    strategy is then a boolean mask over the query descriptors:
+
+        raw        best train match of every query
+        distance   raw matches closer than distance_threshold
+        ratio      Lowe's test: best < ratio * second best
+        symmetry   the best match is mutual (same result as BFMatcher crossCheck)
+
+    Filters combine with &, e.g. sets.matches(sets.masks["ratio"] & sets.masks["symmetry"]).
+    """
+
+    STRATEGIES = ("raw", "distance", "ratio", "symmetry")
+
+    def __init__(self, query, train, detector="SIFT", method="BF", checks=50,
+                 distance_threshold=None, ratio=0.75):
+        forward = MatchIndex(train, detector, method, checks)
+        backward = MatchIndex(query, detector, method, checks)
+        self.train_idx, self.distances = knn_to_arrays(forward.knn_match(query, k=2))
+        backward_idx, _ = knn_to_arrays(backward.knn_match(train, k=2))
+
+        best = self.train_idx[:, 0]
+        d0, d1 = self.distances[:, 0], self.distances[:, 1]
+        raw = best >= 0
+        if distance_threshold is None:
+            distance_threshold = DISTANCE_THRESHOLDS[detector.upper()]
+        query_idx = np.arange(len(best))
+        mutual = np.zeros(len(best), dtype=bool)
+        mutual[raw] = backward_idx[best[raw], 0] == query_idx[raw]
+        self.masks = {
+            "raw": raw,
+            "distance": raw & (d0 < distance_threshold),
+            # Queries without a second neighbour cannot pass the ratio test
+            "ratio": raw & np.isfinite(d1) & (d0 < ratio * d1),
+            "symmetry": mutual,
+        }
+
+    def indices(self, mask):
+        """MatchArrays of the matches selected by a strategy name or mask."""
+        if isinstance(mask, str):
+            mask = self.masks[mask]
+        query_idx = np.flatnonzero(mask)
+        return MatchArrays(query_idx, self.train_idx[query_idx, 0], self.distances[query_idx, 0])
+
+    def matches(self, mask):
+        """cv2.DMatch list for a strategy name or mask (for drawMatches)."""
+        return self.indices(mask).to_dmatches()
+
+    def counts(self):
+        return {name: int(mask.sum()) for name, mask in self.masks.items()}
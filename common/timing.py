@@ -0,0 +1,13 @@
+"""Wall-clock timing helper shared by the benchmark scripts."""
+
+import time
+
+
+def timed(function, repeats=3):
+    """Best-of-repeats wall time of function() and its last result."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result